@@ -2,6 +2,9 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Read-only endpoints are served by the async views from
+``backend.urls_async``; everything else falls through to ``ROOT_URLCONF``.
+The SSE stream at ``/api/events/`` bypasses Django's handler entirely.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -9,8 +12,45 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from asgiref.sync import sync_to_async  # noqa: E402
+
+from core.sse import EVENTS_PATH, events_app  # noqa: E402
+from core.warmup import try_warm_up  # noqa: E402
+
+
+class AsyncReadHandler(ASGIHandler):
+    """ASGI-обработчик с асинхронными представлениями для чтения."""
+
+    urlconf = 'backend.urls_async'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+            return await events_app(scope, receive, send)
+        return await super().__call__(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        """Прогревает процесс до приёма запросов (см. `core.warmup`)."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await sync_to_async(try_warm_up, thread_sensitive=False)()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def get_response_async(self, request):
+        request.urlconf = self.urlconf
+        return await super().get_response_async(request)
+
+
+application = AsyncReadHandler()
@@ -1,4 +1,5 @@
 import os
+from datetime import datetime, timezone
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,6 +21,41 @@ MIN_COOKING_TIME = 1
 MIN_INGREDIENT_AMOUNT = 1
 MIN_IMAGE_SIZE_MB = 5
 PAGE_SIZE = 10
+SHORT_CODE_LENGTH = 8
+SHORT_LINK_CACHE_TIMEOUT = 60 * 60 * 24
+REFERENCE_CACHE_TIMEOUT = 60 * 60
+FACETS_CACHE_TIMEOUT = 60
+COOKING_TIME_BUCKETS = (15, 30, 60, 120)
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_FANOUT_MAX_SUBSCRIBERS = 10000
+FEED_BACKFILL_SIZE = 50
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 32
+SIMILAR_RECIPES_LIMIT = 6
+SIMILAR_CANDIDATES_LIMIT = 200
+PANTRY_MAX_INGREDIENTS = 50
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+TRENDING_HALF_LIFE_HOURS = 72
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_DELAY = 10
+JOB_LOCK_TIMEOUT = 60 * 10
+JOB_POLL_INTERVAL = 1
+THROTTLE_BUCKET_IDLE_TTL = 60 * 60
+THROTTLE_PRUNE_PROBABILITY = 0.001
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+CHANGES_PAGE_SIZE = 500
+EVENTS_CHANNEL = 'foodgram_events'
+SSE_HEARTBEAT = 15
+SSE_MAX_AGE = 60 * 5
+SSE_QUEUE_SIZE = 100
+SSE_RETRY = 3000
+SSE_AUTH_CONCURRENCY = 10
+SSE_TICKET_MAX_AGE = 60
+STARTUP_TIME_BUDGET = 1.5
+# Тяжёлые пакеты, которые импортируются только при первом использовании.
+STARTUP_LAZY_MODULES = ('numpy',)
+RECIPE_JSON_IN_DB = os.getenv('RECIPE_JSON_IN_DB', 'false').lower() == 'true'
 # Application definition
 
 INSTALLED_APPS = [
@@ -60,7 +96,22 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'PAGE_SIZE': ITEMS_ON_PAGE,
+    'DEFAULT_THROTTLE_RATES': {
+        'ingredients': os.getenv('THROTTLE_INGREDIENTS', '600/min'),
+        'shopping_list': os.getenv('THROTTLE_SHOPPING_LIST', '30/min'),
+        'login': os.getenv('THROTTLE_LOGIN', '10/min'),
+    },
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '1')),
 }
 
 DJOSER = {
@@ -96,12 +147,26 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.backends.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'foodgram_database'),
         'USER': os.getenv('POSTGRES_USER', 'foodgram_user'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'foodgram_project'),
         'HOST': os.getenv('POSTGRES_HOST', 'foodgram_db'),
         'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('POSTGRES_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'POSTGRES_CONN_HEALTH_CHECKS', 'true'
+        ).lower() == 'true',
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
     }
 }
 
@@ -1,9 +1,13 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from recipes.views import resolve_short_link
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('recipes.urls')),
     path('api/', include('users.urls')),
+    path('api/', include('core.urls')),
+    path('s/<str:short_code>', resolve_short_link, name='short-link'),
 
 ]
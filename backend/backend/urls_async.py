@@ -0,0 +1,6 @@
+from django.urls import include, path
+
+urlpatterns = [
+    path('api/', include('recipes.async_urls')),
+    path('', include('backend.urls')),
+]
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.signing import BadSignature, TimestampSigner
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from backend.settings import SSE_TICKET_MAX_AGE
+
+ticket_signer = TimestampSigner(salt='core.events.ticket')
+
+
+def token_user(key):
+    """Активный пользователь по ключу токена для кода вне DRF."""
+    try:
+        token = Token.objects.select_related('user').get(key=key)
+    except Token.DoesNotExist:
+        raise AuthenticationFailed('Invalid token.')
+    if not token.user.is_active:
+        raise AuthenticationFailed('User inactive or deleted.')
+    return token.user
+
+
+def issue_ticket(user):
+    """
+    Короткоживущий подписанный билет для потока событий.
+
+    Билет действует SSE_TICKET_MAX_AGE секунд и передаётся в строке
+    запроса вместо токена, который иначе оседал бы в логах и истории.
+    """
+    return ticket_signer.sign(str(user.pk))
+
+
+def ticket_user(ticket):
+    """Активный пользователь по билету из `issue_ticket`."""
+    try:
+        user_id = ticket_signer.unsign(ticket, max_age=SSE_TICKET_MAX_AGE)
+    except BadSignature:
+        raise AuthenticationFailed('Invalid or expired ticket.')
+    user = get_user_model().objects.filter(
+        pk=user_id, is_active=True
+    ).first()
+    if user is None:
+        raise AuthenticationFailed('User inactive or deleted.')
+    return user
+
+
+async def aauthenticate(request):
+    """
+    Асинхронный аналог TokenAuthentication.
+
+    Возвращает пользователя по заголовку `Authorization: Token <key>`
+    или анонимного пользователя, если заголовок не передан.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if not header or header[0].lower() != 'token':
+        return AnonymousUser()
+    if len(header) != 2:
+        raise AuthenticationFailed(
+            'Invalid token header. No credentials provided.'
+        )
+    try:
+        token = await Token.objects.select_related('user').aget(
+            key=header[1]
+        )
+    except Token.DoesNotExist:
+        raise AuthenticationFailed('Invalid token.')
+    if not token.user.is_active:
+        raise AuthenticationFailed('User inactive or deleted.')
+    return token.user
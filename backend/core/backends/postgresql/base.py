@@ -0,0 +1,101 @@
+import threading
+import time
+
+from django.db.backends.postgresql import base
+
+
+class PoolStats:
+    """
+    Счётчики постоянных соединений с БД внутри процесса.
+
+    Соединение открывается один раз и переиспользуется между запросами,
+    пока не истечёт CONN_MAX_AGE или не провалится проверка здоровья.
+    Выдачей считается первый курсор запроса (или задачи): `checkouts`
+    растёт на единицу за запрос, `reused` — если соединение к этому
+    моменту уже было открыто. `avg_connect_ms` — среднее время
+    установки нового соединения.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.connects = 0
+            self.connect_time = 0.0
+            self.checkouts = 0
+            self.reused = 0
+            self.recycled = 0
+
+    def connected(self, duration):
+        with self._lock:
+            self.open += 1
+            self.connects += 1
+            self.connect_time += duration
+
+    def closed(self):
+        with self._lock:
+            self.open -= 1
+
+    def recycled_one(self):
+        with self._lock:
+            self.recycled += 1
+
+    def checked_out(self, reused):
+        with self._lock:
+            self.checkouts += 1
+            self.reused += reused
+
+    def snapshot(self):
+        """Текущие значения метрик в виде словаря."""
+        with self._lock:
+            return {
+                'pool_size': self.open,
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'reused': self.reused,
+                'recycled': self.recycled,
+                'avg_connect_ms': round(
+                    self.connect_time / self.connects * 1000, 3
+                ) if self.connects else 0.0,
+            }
+
+
+pool_stats = PoolStats()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL-бэкенд с учётом открытых и переиспользованных соединений."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checked_out = False
+
+    def connect(self):
+        started = time.monotonic()
+        super().connect()
+        pool_stats.connected(time.monotonic() - started)
+
+    def _close(self):
+        if self.connection is not None:
+            pool_stats.closed()
+        super()._close()
+
+    def _cursor(self, name=None):
+        reused = self.connection is not None
+        cursor = super()._cursor(name)
+        if not self.checked_out:
+            self.checked_out = True
+            pool_stats.checked_out(reused)
+        return cursor
+
+    def close_if_unusable_or_obsolete(self):
+        # Вызывается в начале и в конце каждого запроса
+        # (`close_old_connections`): следующий курсор — новая выдача.
+        self.checked_out = False
+        was_open = self.connection is not None
+        super().close_if_unusable_or_obsolete()
+        if was_open and self.connection is None:
+            pool_stats.recycled_one()
@@ -0,0 +1,98 @@
+"""
+События для пользователей через LISTEN/NOTIFY PostgreSQL.
+
+`publish` отправляет событие в канал EVENTS_CHANNEL. NOTIFY доставляется
+только после фиксации транзакции, поэтому откаченные изменения событий
+не порождают. В каждом ASGI-процессе `broker` держит одно соединение
+с LISTEN и раскладывает события по очередям SSE-подписчиков
+пользователя, так что соединения между воркерами не нужны.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+import psycopg2
+from django.db import connection, connections
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from backend.settings import EVENTS_CHANNEL, SSE_QUEUE_SIZE
+from .renderers import dumps
+
+logger = logging.getLogger(__name__)
+
+
+def publish(user_id, event, data):
+    """Отправляет событие пользователю после фиксации транзакции."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [
+            EVENTS_CHANNEL,
+            dumps({'user': user_id, 'event': event, 'data': data}).decode(),
+        ])
+
+
+class Broker:
+    """Раздаёт уведомления из PostgreSQL очередям подписчиков процесса."""
+
+    def __init__(self):
+        self.queues = defaultdict(set)
+        self.connection = None
+        self.lock = None
+
+    def connect(self):
+        params = connections['default'].get_connection_params()
+        db = psycopg2.connect(**params)
+        db.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with db.cursor() as cursor:
+            cursor.execute(f'LISTEN {EVENTS_CHANNEL}')
+        return db
+
+    async def listen(self):
+        """Открывает соединение с LISTEN, если его ещё нет или оно упало."""
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if self.connection is not None:
+                return
+            self.connection = await asyncio.to_thread(self.connect)
+            asyncio.get_running_loop().add_reader(
+                self.connection.fileno(), self.read
+            )
+
+    def close(self):
+        asyncio.get_running_loop().remove_reader(self.connection.fileno())
+        self.connection.close()
+        self.connection = None
+
+    def read(self):
+        try:
+            self.connection.poll()
+        except psycopg2.Error:
+            logger.warning('Соединение LISTEN потеряно', exc_info=True)
+            self.close()
+            return
+        while self.connection.notifies:
+            self.dispatch(self.connection.notifies.pop(0).payload)
+
+    def dispatch(self, payload):
+        message = json.loads(payload)
+        for queue in self.queues.get(message['user'], ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Клиент не успевает читать: событие для него теряется.
+                pass
+
+    async def subscribe(self, user_id):
+        await self.listen()
+        queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+        self.queues[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        self.queues[user_id].discard(queue)
+        if not self.queues[user_id]:
+            del self.queues[user_id]
+
+
+broker = Broker()
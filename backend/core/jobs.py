@@ -0,0 +1,108 @@
+"""
+Очередь фоновых задач в PostgreSQL.
+
+Задачи регистрируются декоратором `job` в модулях `tasks.py`
+приложений и ставятся в очередь через `enqueue` или
+`enqueue_on_commit`. Команда `run_worker` забирает задачи через
+`SELECT ... FOR UPDATE SKIP LOCKED`, поэтому несколько воркеров
+не берут одну и ту же задачу.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from backend.settings import (JOB_LOCK_TIMEOUT, JOB_MAX_ATTEMPTS,
+                              JOB_RETRY_BASE_DELAY)
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def job(func=None, *, max_attempts=JOB_MAX_ATTEMPTS):
+    """Регистрирует функцию как фоновую задачу."""
+    def decorator(func):
+        func.job_name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        registry[func.job_name] = func
+        return func
+    return decorator(func) if func else decorator
+
+
+def enqueue(func, run_at=None, **kwargs):
+    """Ставит задачу в очередь; аргументы должны сериализоваться в JSON."""
+    return Job.objects.create(
+        name=func.job_name,
+        payload=kwargs,
+        max_attempts=func.max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def enqueue_on_commit(func, **kwargs):
+    """Ставит задачу в очередь после фиксации текущей транзакции."""
+    transaction.on_commit(lambda: enqueue(func, **kwargs))
+
+
+def discover_jobs():
+    """Импортирует модули `tasks.py` всех приложений."""
+    autodiscover_modules('tasks')
+
+
+def claim_jobs(limit):
+    """Забирает готовые к запуску задачи, пропуская занятые другими."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Job.QUEUED, run_at__lte=now)
+                | Q(
+                    status=Job.RUNNING,
+                    locked_at__lt=now - timedelta(seconds=JOB_LOCK_TIMEOUT)
+                )
+            )
+            .order_by('run_at')[:limit]
+        )
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=Job.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def run_job(job):
+    """Выполняет задачу; при ошибке планирует повтор с задержкой."""
+    func = registry.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'Задача {job.name} не зарегистрирована')
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s (%s) упала:\n%s', job.name, job.id, error)
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=JOB_RETRY_BASE_DELAY * 2 ** (job.attempts - 1)
+            )
+        job.last_error = error
+        job.locked_at = None
+        job.save(update_fields=(
+            'status', 'run_at', 'last_error', 'locked_at', 'updated_at'
+        ))
+        return False
+    job.delete()
+    return True
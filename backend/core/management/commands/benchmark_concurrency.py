@@ -0,0 +1,76 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Команда для сравнения пропускной способности развёртываний.
+
+    Пример: запустить gunicorn (`backend.wsgi`) и uvicorn
+    (`backend.asgi:application`) на разных портах и передать оба адреса.
+    """
+
+    help = 'Compare throughput of sync (WSGI) and ASGI deployments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='+',
+            help='Цели в формате name=url, например asgi=http://...'
+        )
+        parser.add_argument(
+            '--concurrency', default='1,10,50',
+            help='Число одновременных клиентов через запятую'
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--token', help='Токен для заголовка Authorization'
+        )
+
+    def fetch(self, url, headers):
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(
+                urllib.request.Request(url, headers=headers), timeout=60
+            ) as response:
+                response.read()
+            ok = True
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return time.perf_counter() - started, ok
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        try:
+            targets = dict(item.split('=', 1) for item in options['targets'])
+            levels = [
+                int(level) for level in options['concurrency'].split(',')
+            ]
+        except ValueError:
+            raise CommandError('Неверный формат целей или уровней нагрузки')
+
+        total = options['requests']
+        for name, url in targets.items():
+            for level in levels:
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=level) as executor:
+                    results = list(executor.map(
+                        lambda _: self.fetch(url, headers), range(total)
+                    ))
+                elapsed = time.perf_counter() - started
+                latencies = sorted(latency for latency, _ in results)
+                errors = sum(not ok for _, ok in results)
+                p95 = latencies[int(len(latencies) * 0.95) - 1]
+                self.stdout.write(
+                    f'{name:<8} c={level:<4} '
+                    f'{total / elapsed:8.1f} req/s  '
+                    f'p50={statistics.median(latencies) * 1000:7.1f} мс  '
+                    f'p95={p95 * 1000:7.1f} мс  '
+                    f'ошибок={errors}'
+                )
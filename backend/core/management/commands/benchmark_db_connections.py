@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    """Команда для замера выигрыша от постоянных соединений с БД."""
+
+    help = 'Compare per-request latency of new vs persistent DB connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        wrapper = connections.create_connection(options['database'])
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            wrapper.connect()
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            wrapper.close()
+        fresh = (time.perf_counter() - started) / iterations
+
+        wrapper.connect()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        persistent = (time.perf_counter() - started) / iterations
+        wrapper.close()
+
+        self.stdout.write(
+            f'Новое соединение на запрос: {fresh * 1000:.3f} мс\n'
+            f'Постоянное соединение:      {persistent * 1000:.3f} мс\n'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Экономия на запрос: {(fresh - persistent) * 1000:.3f} мс'
+        ))
@@ -0,0 +1,111 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer, orjson
+from recipes.filters import RecipeFilter
+from recipes.models import Recipe
+from recipes.views import RecipeView
+from users.models import User
+
+
+class Command(BaseCommand):
+    """
+    Команда для сравнения скорости JSONRenderer/JSONParser DRF
+    и их версий на orjson на реальных страницах списка рецептов.
+    """
+
+    help = 'Benchmark JSON rendering and parsing of recipe list pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=10)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def load_pages(self, pages, limit):
+        """Данные страниц списка рецептов до рендеринга."""
+        factory = APIRequestFactory()
+        view = RecipeView.as_view({'get': 'list'})
+        user = User.objects.filter(recipes__isnull=False).first()
+        result = []
+        for page in range(1, pages + 1):
+            request = factory.get(
+                '/api/recipes/', {'page': page, 'limit': limit}
+            )
+            force_authenticate(request, user)
+            response = view(request)
+            if response.status_code != 200:
+                break
+            result.append(response.data)
+        return result
+
+    def load_errors(self):
+        """Ответы с ошибками: ErrorDict/ErrorList Django и DRF."""
+        errors = RecipeFilter(
+            QueryDict('tags=nope&ordering=bogus&author=abc'),
+            queryset=Recipe.objects.all(),
+        ).errors
+        return [
+            errors,
+            ValidationError(errors).detail,
+            ValidationError({'ingredients': ['Нужен ингредиент']}).detail,
+        ]
+
+    def measure(self, func, items, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for item in items:
+                func(item)
+        return (time.perf_counter() - started) / (iterations * len(items))
+
+    def report(self, title, items, iterations, size, baseline, fast):
+        base = self.measure(baseline, items, iterations)
+        quick = self.measure(fast, items, iterations)
+        self.stdout.write(f'{title}:')
+        for name, seconds in (('DRF', base), ('orjson', quick)):
+            self.stdout.write(
+                f'  {name:<7} {seconds * 1e6:9.1f} мкс/стр. '
+                f'{1 / seconds:9.0f} стр./с '
+                f'{size / seconds / 2 ** 20:7.1f} МБ/с'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'  Ускорение: {base / quick:.1f}x')
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson не установлен')
+        pages = self.load_pages(options['pages'], options['limit'])
+        if not pages:
+            raise CommandError('Нет рецептов: заполните базу')
+        drf, fast = JSONRenderer(), ORJSONRenderer()
+        bodies = [drf.render(page) for page in pages]
+        if bodies != [fast.render(page) for page in pages]:
+            raise CommandError('Вывод рендереров отличается')
+        for errors in self.load_errors():
+            if drf.render(errors) != fast.render(errors):
+                raise CommandError(
+                    'Вывод рендереров отличается для ошибок: '
+                    f'{fast.render(errors).decode()}'
+                )
+        size = sum(map(len, bodies)) / len(bodies)
+        self.stdout.write(
+            f'Страниц: {len(pages)}, средний размер: {size / 1024:.1f} КБ'
+        )
+        self.report(
+            'Рендеринг', pages, options['iterations'], size,
+            drf.render, fast.render
+        )
+        json_parser, orjson_parser = JSONParser(), ORJSONParser()
+        self.report(
+            'Разбор', bodies, options['iterations'], size,
+            lambda body: json_parser.parse(io.BytesIO(body)),
+            lambda body: orjson_parser.parse(io.BytesIO(body)),
+        )
@@ -0,0 +1,76 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.renderers import ORJSONRenderer
+from recipes.views import RecipeView
+from users.models import User
+
+VARIANTS = (
+    ('Вложенные', {}),
+    ('include', {'include': 'users,tags'}),
+)
+
+
+class Command(BaseCommand):
+    """
+    Команда для сравнения размера и времени ответа списка рецептов
+    с вложенными авторами и тегами и с вынесенными в `included`.
+    """
+
+    help = 'Compare recipe list pages with nested and sideloaded relations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=10)
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def fetch(self, user, params):
+        """Тела ответов страниц списка и среднее время на страницу."""
+        factory = APIRequestFactory()
+        view = RecipeView.as_view({'get': 'list'})
+        renderer = ORJSONRenderer()
+        bodies = []
+        started = time.perf_counter()
+        for _ in range(self.options['iterations']):
+            bodies = []
+            for page in range(1, self.options['pages'] + 1):
+                request = factory.get('/api/recipes/', {
+                    'page': page, 'limit': self.options['limit'], **params
+                })
+                force_authenticate(request, user)
+                response = view(request)
+                if response.status_code != 200:
+                    break
+                bodies.append(renderer.render(response.data))
+        if not bodies:
+            raise CommandError('Нет рецептов: заполните базу')
+        elapsed = time.perf_counter() - started
+        return bodies, elapsed / (self.options['iterations'] * len(bodies))
+
+    def handle(self, *args, **options):
+        self.options = options
+        user = User.objects.filter(recipes__isnull=False).first()
+        if user is None:
+            raise CommandError('Нет рецептов: заполните базу')
+        results = []
+        for title, params in VARIANTS:
+            bodies, seconds = self.fetch(user, params)
+            size = sum(map(len, bodies)) / len(bodies)
+            packed = sum(len(gzip.compress(body)) for body in bodies)
+            results.append((title, size, packed / len(bodies), seconds))
+        self.stdout.write(f'Страниц: {len(bodies)}, limit={options["limit"]}')
+        for title, size, packed, seconds in results:
+            self.stdout.write(
+                f'  {title:<10} {size / 1024:7.1f} КБ '
+                f'(gzip {packed / 1024:5.1f} КБ) '
+                f'{seconds * 1e3:7.2f} мс/стр.'
+            )
+        (_, size, packed, seconds), (_, *sideloaded) = results
+        self.stdout.write(self.style.SUCCESS(
+            f'  Размер: {sideloaded[0] / size - 1:+.0%}, '
+            f'gzip: {sideloaded[1] / packed - 1:+.0%}, '
+            f'время: {seconds / sideloaded[2]:.2f}x'
+        ))
@@ -0,0 +1,421 @@
+import base64
+import io
+import json
+import re
+import tempfile
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, get_resolver
+from django_filters import filters
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.filters import IngredientFilter, RecipeFilter
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+CURSOR_RE = re.compile(r'^DECLARE .+? CURSOR .*?FOR (.+)$', re.S)
+SKIPPED = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'SET ')
+# Параметры маршрутов: (?P<pk>...) у роутеров DRF и <uuid:pk> у path().
+PARAM_RE = re.compile(r'\(\?P<(\w+)>[^)]*\)|<(?:\w+:)?(\w+)>')
+METHODS = ('get', 'post', 'put', 'patch', 'delete')
+# Корни API только перечисляют маршруты, а проверки здоровья делают
+# SELECT 1 и при прогреве закрывают соединения, обрывая транзакцию
+# аудита. Варианты с суффиксом формата пропускаются отдельно.
+SKIPPED_ROUTES = ('api-root', 'health-live', 'health-ready')
+# Удаление пользователя идёт последним: после него запросы от его
+# имени теряют смысл.
+LAST_ROUTES = ('user-detail', 'user-me')
+# Записи, которые выполняет аноним: регистрация и вход.
+ANONYMOUS_WRITES = ('user-list', 'login', 'custom-token-login')
+PASSWORD = 'Explain-endpoints-1'
+
+
+def walk(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from walk(child)
+
+
+class Command(BaseCommand):
+    """
+    Команда для аудита планов запросов всех эндпоинтов API.
+
+    Выполняет запросы к API через тестовый клиент на заполненной базе,
+    повторяет каждый SQL-запрос с EXPLAIN (ANALYZE, BUFFERS) и отмечает
+    последовательное чтение больших таблиц, вложенные циклы с большим
+    числом повторов и сортировки, не поместившиеся в work_mem.
+    Эндпоинты и их методы берутся из URL-конфигурации, поэтому новые
+    действия роутеров попадают в аудит сами; изменяющие запросы
+    получают тела из `bodies`. Запросы к списку рецептов и ингредиентов
+    перебираются по всем фильтрам RecipeFilter и IngredientFilter и их
+    сочетаниям. Все изменения данных откатываются, файлы пишутся во
+    временный MEDIA_ROOT.
+    """
+
+    help = 'Run EXPLAIN ANALYZE for every query issued by the API endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            help='Пользователь для запросов с аутентификацией'
+        )
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='Seq Scan по таблицам от этого размера считается проблемой'
+        )
+        parser.add_argument(
+            '--max-loops', type=int, default=1000,
+            help='Допустимое число повторов внутреннего узла Nested Loop'
+        )
+        parser.add_argument(
+            '--combinations', type=int, default=2,
+            help='Сколько фильтров сочетать в одном запросе'
+        )
+        parser.add_argument(
+            '--output', help='Файл для отчёта; по умолчанию stdout'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Отчёт в формате JSON'
+        )
+        parser.add_argument(
+            '--fail-on-issues', action='store_true',
+            help='Завершиться с ошибкой, если найдены проблемы'
+        )
+
+    def filter_values(self, filterset_class, name, filter_):
+        """Примеры значений фильтра на данных текущей базы."""
+        if isinstance(filter_, filters.BooleanFilter):
+            return ['1', '0']
+        if isinstance(filter_, filters.QuerySetRequestMixin):
+            obj = filter_.extra['queryset'].first()
+            field = filter_.extra.get('to_field_name') or 'pk'
+            return [str(getattr(obj, field))] if obj else []
+        if isinstance(filter_, filters.ChoiceFilter):
+            return [value for value, _ in filter_.extra['choices']]
+        value = (
+            filterset_class._meta.model.objects
+            .exclude(**{f'{filter_.field_name}__isnull': True})
+            .values_list(filter_.field_name, flat=True)
+            .first()
+        )
+        return [str(value)[:3]] if value is not None else []
+
+    def filter_queries(self, filterset_class):
+        """Строки запроса для всех фильтров и их сочетаний."""
+        options = [
+            [(name, value) for value in self.filter_values(
+                filterset_class, name, filter_
+            )]
+            for name, filter_ in filterset_class.base_filters.items()
+        ]
+        options = [values for values in options if values]
+        queries = ['']
+        for size in range(1, self.options['combinations'] + 1):
+            for group in combinations(options, size):
+                queries.extend(self.product(group))
+        return queries
+
+    def product(self, group):
+        if not group:
+            yield ''
+            return
+        for rest in self.product(group[1:]):
+            for name, value in group[0]:
+                yield '&'.join(filter(None, (f'{name}={value}', rest)))
+
+    def routes(self, patterns=None, prefix=''):
+        """Пары (шаблон пути, маршрут) API и коротких ссылок."""
+        for pattern in patterns or get_resolver().url_patterns:
+            route = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                if route.startswith(('api/', 's/')):
+                    yield from self.routes(pattern.url_patterns, route)
+            elif (
+                route.startswith(('api/', 's/'))
+                and 'format' not in pattern.pattern.regex.groupindex
+                and pattern.name not in SKIPPED_ROUTES
+            ):
+                yield route, pattern
+
+    def methods(self, callback):
+        """HTTP-методы представления без HEAD и OPTIONS."""
+        if getattr(callback, 'actions', None):
+            return [m for m in METHODS if m in callback.actions]
+        view = getattr(callback, 'cls', None)
+        if view is None:
+            return ['get']
+        return [m for m in METHODS if hasattr(view, m)]
+
+    def image(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (2, 2)).save(buffer, 'PNG')
+        return (
+            'data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode()
+        )
+
+    def bodies(self, user, recipe):
+        """Тела изменяющих запросов: (метод, имя маршрута) -> данные."""
+        tag = Tag.objects.first()
+        recipe_data = {
+            'name': 'Рецепт для EXPLAIN',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': self.image(),
+            'tags': [tag.id],
+            'ingredients': [
+                {'id': item.ingredient_id, 'amount': item.amount}
+                for item in recipe.ingredients.all()[:3]
+            ],
+        }
+        # Название рецепта уникально: изменённый рецепт не должен
+        # совпасть с созданным.
+        updated_data = {**recipe_data, 'name': 'Изменённый рецепт'}
+        return {
+            ('post', 'recipe-list'): recipe_data,
+            ('put', 'recipe-detail'): updated_data,
+            ('patch', 'recipe-detail'): updated_data,
+            ('post', 'user-list'): {
+                'email': 'explain@example.com', 'username': 'explain',
+                'first_name': 'Explain', 'last_name': 'Endpoints',
+                'password': PASSWORD,
+            },
+            ('post', 'user-set-password'): {
+                'current_password': PASSWORD,
+                'new_password': PASSWORD[::-1],
+            },
+            ('put', 'user-manage-avatar'): {'avatar': self.image()},
+            ('post', 'login'): {'email': user.email, 'password': PASSWORD},
+            ('post', 'custom-token-login'): {
+                'email': user.email, 'password': PASSWORD,
+            },
+            ('post', 'batch'): {'requests': [
+                {'path': '/api/tags/'}, {'path': '/api/recipes/'},
+            ]},
+        }
+
+    def endpoints(self, user):
+        """
+        Четвёрки (метод, путь, аутентифицирован ли клиент, тело) для
+        всех маршрутов API. Изменения собственных объектов (рецепт,
+        профиль) выполняются над объектами `user`, остальные — над
+        чужим рецептом и его автором.
+        """
+        recipe = Recipe.objects.exclude(author=user).first()
+        own = Recipe.objects.filter(author=user).first()
+        ingredient_ids = ','.join(
+            str(item.ingredient_id) for item in recipe.ingredients.all()[:3]
+        )
+        bodies = self.bodies(user, recipe)
+        queries = {
+            'recipe-list': self.filter_queries(RecipeFilter),
+            'ingredient-list': self.filter_queries(IngredientFilter),
+            'recipe-by-ingredients': [f'ingredients={ingredient_ids}'],
+        }
+        params = {
+            'recipe': recipe.id,
+            'tag': Tag.objects.values_list('id', flat=True).first(),
+            'ingredient': Ingredient.objects.values_list(
+                'id', flat=True
+            ).first(),
+            'user': recipe.author_id,
+            'short_url': recipe.short_url,
+            'short_code': recipe.short_code,
+        }
+        result, seen = [], set()
+        for route, pattern in self.routes():
+            basename = (pattern.name or '').split('-')[0]
+            for method in self.methods(pattern.callback):
+                owned = method != 'get' and pattern.name in (
+                    'recipe-detail', 'user-detail'
+                )
+                values = {
+                    **params,
+                    'recipe': own.id if owned and own else params['recipe'],
+                    'user': user.id if owned else params['user'],
+                }
+                path = '/' + PARAM_RE.sub(
+                    lambda match: str(values.get(
+                        match[1] or match[2], values.get(basename, '')
+                    )),
+                    route.replace('^', '').replace('$', ''),
+                ).replace('/?', '/')
+                if (method, path) in seen:
+                    continue
+                seen.add((method, path))
+                order = (
+                    METHODS.index(method),
+                    method == 'delete' and pattern.name in LAST_ROUTES,
+                )
+                if method == 'get':
+                    result += [
+                        (order, (
+                            method, f'{path}?{query}' if query else path,
+                            auth, None,
+                        ))
+                        for query in queries.get(pattern.name, [''])
+                        for auth in (False, True)
+                    ]
+                else:
+                    result.append((order, (
+                        method, path, pattern.name not in ANONYMOUS_WRITES,
+                        bodies.get((method, pattern.name)),
+                    )))
+        result.sort(key=lambda item: item[0])
+        return [endpoint for _, endpoint in result]
+
+    def explain(self, sql):
+        """План запроса в формате JSON или None, если запрос пропущен."""
+        if sql.upper().startswith(SKIPPED):
+            return None
+        match = CURSOR_RE.match(sql)
+        if match:
+            sql = match.group(1)
+        savepoint = transaction.savepoint()
+        try:
+            with connection.cursor() as cursor:
+                # Без параметров драйвер не подставляет значения,
+                # и `%` в тексте запроса остаётся как есть.
+                cursor.execute(
+                    'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sql
+                )
+                return cursor.fetchone()[0][0]
+        except DatabaseError as error:
+            return {'error': str(error).strip()}
+        finally:
+            transaction.savepoint_rollback(savepoint)
+
+    def issues(self, plan):
+        """Проблемные узлы плана."""
+        found = []
+        for node in walk(plan['Plan']):
+            kind = node['Node Type']
+            relation = node.get('Relation Name')
+            rows = self.table_rows.get(relation, 0)
+            if kind == 'Seq Scan' and rows >= self.options['min_rows']:
+                found.append(
+                    f'Seq Scan по {relation} '
+                    f'(~{rows:.0f} строк)'
+                )
+            if kind == 'Nested Loop':
+                inner = node['Plans'][-1]
+                if inner.get('Actual Loops', 0) > self.options['max_loops']:
+                    found.append(
+                        f'Nested Loop: {inner["Node Type"]} '
+                        f'выполнен {inner["Actual Loops"]} раз'
+                    )
+            if kind == 'Sort' and node.get('Sort Space Type') == 'Disk':
+                found.append(
+                    f'Sort на диске ({node.get("Sort Space Used")} kB)'
+                )
+            if kind == 'Hash' and node.get('Hash Batches', 1) > 1:
+                found.append(
+                    f'Hash на диске ({node["Hash Batches"]} пакетов)'
+                )
+        return found
+
+    def audit(self, client, method, path, data=None):
+        savepoint = transaction.savepoint()
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(path, data, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+        transaction.savepoint_rollback(savepoint)
+        queries = []
+        for query in context.captured_queries:
+            plan = self.explain(query['sql'])
+            if plan is None:
+                continue
+            entry = {'sql': query['sql']}
+            if 'error' in plan:
+                entry['issues'] = [f'EXPLAIN не выполнен: {plan["error"]}']
+            else:
+                entry['time_ms'] = plan['Execution Time']
+                entry['issues'] = self.issues(plan)
+            queries.append(entry)
+        if method != 'get':
+            # Повторяем изменение, чтобы следующие запросы видели его.
+            getattr(client, method)(path, data, format='json')
+        return {
+            'status': response.status_code,
+            'queries': queries,
+            'time_ms': sum(entry.get('time_ms', 0) for entry in queries),
+        }
+
+    def render(self, report):
+        lines = []
+        for item in report:
+            user = 'пользователь' if item['auth'] else 'аноним'
+            lines.append(
+                f'{item["method"].upper()} {item["path"]} ({user}) — '
+                f'{item["status"]}, запросов: {len(item["queries"])}, '
+                f'{item["time_ms"]:.2f} мс в БД'
+            )
+            for number, entry in enumerate(item['queries'], 1):
+                for issue in entry['issues']:
+                    lines.append(f'  ! #{number}: {issue}')
+                if entry['issues'] and self.options['verbosity'] > 1:
+                    lines.append(f'    {entry["sql"]}')
+        return '\n'.join(lines) + '\n'
+
+    def handle(self, *args, **options):
+        self.options = options
+        user = (
+            User.objects.filter(email=options['email']).first()
+            if options['email']
+            else User.objects.filter(recipes__isnull=False).first()
+        )
+        if user is None or not Recipe.objects.exclude(author=user).exists():
+            raise CommandError(
+                'Нужна заполненная база: пользователь и чужие рецепты'
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, greatest(reltuples, 0) FROM pg_class "
+                "WHERE relkind = 'r'"
+            )
+            self.table_rows = dict(cursor.fetchall())
+        anonymous, authenticated = APIClient(), APIClient()
+        authenticated.force_authenticate(user)
+        report = []
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            MEDIA_ROOT=media
+        ), transaction.atomic():
+            user.set_password(PASSWORD)
+            user.save(update_fields=['password'])
+            for method, path, auth, data in self.endpoints(user):
+                client = authenticated if auth else anonymous
+                result = self.audit(client, method, path, data)
+                report.append(
+                    {'method': method, 'path': path, 'auth': auth, **result}
+                )
+            transaction.set_rollback(True)
+        text = (
+            json.dumps(report, ensure_ascii=False, indent=2)
+            if options['json'] else self.render(report)
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(text)
+        else:
+            self.stdout.write(text, ending='')
+        issues = sum(
+            len(entry['issues'])
+            for item in report for entry in item['queries']
+        )
+        summary = (
+            f'Эндпоинтов: {len(report)}, запросов: '
+            f'{sum(len(item["queries"]) for item in report)}, '
+            f'проблем: {issues}'
+        )
+        if issues and options['fail_on_issues']:
+            raise CommandError(summary)
+        self.stderr.write(
+            self.style.WARNING(summary) if issues
+            else self.style.SUCCESS(summary)
+        )
@@ -0,0 +1,121 @@
+import json
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.settings import STARTUP_LAZY_MODULES, STARTUP_TIME_BUDGET
+
+# Что делает воркер до первого ответа: загружает приложение и
+# URL-конфигурации (а с ними все представления).
+BOOT = {
+    'wsgi': ('backend.wsgi', (settings.ROOT_URLCONF,)),
+    'asgi': ('backend.asgi', (settings.ROOT_URLCONF, 'backend.urls_async')),
+}
+
+CHILD = '''
+import json
+import sys
+import time
+started = time.perf_counter()
+import {module}
+from django.urls import get_resolver
+for urlconf in {urlconfs!r}:
+    get_resolver(urlconf).url_patterns
+print(json.dumps({{
+    'elapsed': time.perf_counter() - started,
+    'loaded': [name for name in {lazy!r} if name in sys.modules],
+}}))
+'''
+
+
+class Command(BaseCommand):
+    """
+    Команда для профилирования старта воркера.
+
+    Загружает приложение в отдельном процессе с `-X importtime` и
+    выводит модули с наибольшим суммарным временем импорта (вместе с
+    вложенными) и собственное время импорта по пакетам. Время старта
+    без профилирования сравнивается с бюджетом STARTUP_TIME_BUDGET,
+    а пакеты из STARTUP_LAZY_MODULES не должны загружаться при старте:
+    иначе команда завершается с ошибкой, поэтому её можно запускать
+    в CI.
+    """
+
+    help = 'Profile worker startup imports and check the time budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--app', choices=BOOT, default='wsgi')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument(
+            '--budget', type=float, default=STARTUP_TIME_BUDGET,
+            help='Бюджет времени старта, с'
+        )
+
+    def boot(self, app, *flags):
+        """
+        Загружает приложение в новом процессе; (время, загруженные
+        пакеты из STARTUP_LAZY_MODULES, stderr).
+        """
+        module, urlconfs = BOOT[app]
+        result = subprocess.run(
+            [
+                sys.executable, *flags, '-c',
+                CHILD.format(
+                    module=module,
+                    urlconfs=urlconfs,
+                    lazy=STARTUP_LAZY_MODULES,
+                ),
+            ],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Приложение не загрузилось:\n{result.stderr}')
+        report = json.loads(result.stdout.splitlines()[-1])
+        return report['elapsed'], report['loaded'], result.stderr
+
+    def parse(self, stderr):
+        """Строки `-X importtime`: (собственное, суммарное мкс, модуль)."""
+        rows = []
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            own, cumulative, name = line[len('import time:'):].split('|')
+            rows.append((int(own), int(cumulative), name.strip()))
+        return rows
+
+    def handle(self, *args, **options):
+        _, loaded, stderr = self.boot(options['app'], '-X', 'importtime')
+        rows = self.parse(stderr)
+        self.stdout.write('Модули, суммарное время импорта:')
+        for own, cumulative, name in sorted(
+            rows, key=lambda row: -row[1]
+        )[:options['limit']]:
+            self.stdout.write(f'  {cumulative / 1000:8.1f} мс  {name}')
+        packages = Counter()
+        for own, _, name in rows:
+            packages[name.split('.')[0]] += own
+        self.stdout.write('Пакеты, собственное время импорта:')
+        for package, own in packages.most_common(options['limit']):
+            self.stdout.write(f'  {own / 1000:8.1f} мс  {package}')
+
+        elapsed = min(
+            self.boot(options['app'])[0]
+            for _ in range(max(1, options['repeat']))
+        )
+        summary = (
+            f'Старт {options["app"]}: {elapsed:.2f} с, '
+            f'{len(rows)} модулей, бюджет {options["budget"]:.2f} с'
+        )
+        if elapsed > options['budget']:
+            raise CommandError(f'Бюджет превышен. {summary}')
+        if loaded:
+            raise CommandError(
+                f'При старте загружены {", ".join(loaded)}. {summary}'
+            )
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,68 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from backend.settings import JOB_POLL_INTERVAL
+from core.jobs import claim_jobs, discover_jobs, run_job
+
+
+class Command(BaseCommand):
+    """Команда для запуска воркера фоновых задач."""
+
+    help = 'Run background jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Число потоков, выполняющих задачи'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=JOB_POLL_INTERVAL,
+            help='Пауза в секундах, если очередь пуста'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда очередь опустеет'
+        )
+
+    def work(self, stop, poll_interval, burst, counts):
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                jobs = claim_jobs(1)
+                if not jobs:
+                    if burst:
+                        return
+                    stop.wait(poll_interval)
+                    continue
+                for job in jobs:
+                    counts['ok' if run_job(job) else 'failed'] += 1
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        discover_jobs()
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+        counts = {'ok': 0, 'failed': 0}
+        threads = [
+            threading.Thread(
+                target=self.work,
+                args=(
+                    stop, options['poll_interval'], options['burst'], counts
+                ),
+            )
+            for _ in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+        self.stdout.write(self.style.SUCCESS(
+            f'Воркер остановлен: выполнено {counts["ok"]}, '
+            f'с ошибкой {counts["failed"]}'
+        ))
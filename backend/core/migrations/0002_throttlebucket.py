@@ -0,0 +1,30 @@
+# Generated by Django 4.2.20 on 2026-10-19 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleBucket',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Ключ')),
+                ('tokens', models.FloatField(verbose_name='Токенов')),
+                ('allowed', models.BooleanField(default=True, verbose_name='Последний запрос разрешён')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Счётчик запросов',
+                'verbose_name_plural': 'Счётчики запросов',
+            },
+        ),
+        migrations.RunSQL(
+            'ALTER TABLE core_throttlebucket SET UNLOGGED',
+            'ALTER TABLE core_throttlebucket SET LOGGED',
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class TimeStampModel(models.Model):
@@ -14,3 +15,118 @@ class TimeStampModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Job(TimeStampModel):
+    """Фоновая задача в очереди на базе PostgreSQL."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Завершилась с ошибкой'),
+    )
+
+    name = models.CharField(
+        max_length=255,
+        verbose_name='Задача'
+    )
+    payload = models.JSONField(
+        default=dict,
+        verbose_name='Аргументы'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запустить не раньше'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взята в работу'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='job_status_run_at_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
+
+
+class ThrottleBucket(models.Model):
+    """
+    Состояние token bucket для ограничения частоты запросов.
+
+    Таблица нежурналируемая (UNLOGGED): она общая для всех воркеров,
+    но не пишется в WAL и очищается после сбоя PostgreSQL.
+    """
+
+    key = models.CharField(
+        max_length=255,
+        primary_key=True,
+        verbose_name='Ключ'
+    )
+    tokens = models.FloatField(verbose_name='Токенов')
+    allowed = models.BooleanField(
+        default=True,
+        verbose_name='Последний запрос разрешён'
+    )
+    updated_at = models.DateTimeField(verbose_name='Дата обновления')
+
+    class Meta:
+        verbose_name = 'Счётчик запросов'
+        verbose_name_plural = 'Счётчики запросов'
+
+    def __str__(self):
+        return self.key
+
+
+class CacheVersion(models.Model):
+    """
+    Версия данных, от которой зависят ключи кэша.
+
+    Хранится в базе, поэтому сброс кэша увеличением версии виден
+    всем процессам, даже если у каждого свой локальный кэш.
+    """
+
+    name = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name='Данные'
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Версия'
+    )
+
+    class Meta:
+        verbose_name = 'Версия кэша'
+        verbose_name_plural = 'Версии кэша'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
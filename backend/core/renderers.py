@@ -0,0 +1,88 @@
+"""
+Быстрый JSON-рендерер на orjson.
+
+Если orjson не установлен, используется стандартный JSONRenderer DRF.
+Вывод совпадает с JSONRenderer при COMPACT_JSON и UNICODE_JSON.
+Подклассы встроенных типов передаются в `default`: orjson сериализует
+их по внутреннему хранилищу, а, например, `ErrorList` Django хранит
+элементы в `data`, и без этого превращался бы в `[]`.
+"""
+import datetime
+import decimal
+
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = (
+        orjson.OPT_UTC_Z
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_SUBCLASS
+    )
+
+
+def default(obj):
+    """Типы, которые orjson не умеет сериализовать сам."""
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, str):
+        # Подклассы str: ErrorDetail, SafeString.
+        return str(obj)
+    if isinstance(obj, bool):
+        return bool(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    if isinstance(obj, float):
+        return float(obj)
+    if isinstance(obj, decimal.Decimal):
+        # Как в encoders.JSONEncoder DRF.
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, QuerySet):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'keys'):
+        return dict(obj)
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f'{type(obj).__name__} is not JSON serializable')
+
+
+def escape_separators(content):
+    """Экранирует U+2028 и U+2029, как JSONRenderer DRF."""
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
+    return content
+
+
+def dumps(data):
+    """Компактный JSON в UTF-8, безопасный для встраивания в JavaScript."""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    return escape_separators(
+        orjson.dumps(data, default=default, option=OPTIONS)
+    )
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson; вывод с отступами остаётся за DRF."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -0,0 +1,77 @@
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.serializers import ListSerializer
+
+from backend.settings import BATCH_MAX_REQUESTS
+
+
+def parse_field_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def sparse_fields(request, field_names):
+    """
+    Поля из `field_names`, оставшиеся после параметров запроса
+    `?fields=` (какие поля вернуть) и `?omit=` (какие поля убрать).
+    """
+    params = getattr(request, 'query_params', None)
+    if params is None:
+        params = getattr(request, 'GET', {})
+    only = params.get('fields')
+    only = parse_field_names(only) if only else None
+    omit = parse_field_names(params.get('omit', ''))
+    return [
+        name for name in field_names
+        if (only is None or name in only) and name not in omit
+    ]
+
+
+class SparseFieldsetMixin:
+    """
+    Поддержка `?fields=` и `?omit=` в сериализаторе.
+
+    Параметры применяются только к корневому сериализатору ответа,
+    вложенные сериализаторы возвращаются целиком. Контекст
+    `{'sparse': False}` отключает отбор полей.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        request = self.context.get('request')
+        if (
+            parent is not None
+            or request is None
+            or not self.context.get('sparse', True)
+        ):
+            return fields
+        return {
+            name: fields[name] for name in sparse_fields(request, fields)
+        }
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """Подзапрос пакета: только GET к API, кроме самого пакета."""
+
+    method = serializers.ChoiceField(choices=('GET',), default='GET')
+    path = serializers.CharField()
+
+    def validate_path(self, value):
+        if not value.startswith('/api/'):
+            raise serializers.ValidationError(
+                'Путь должен начинаться с /api/.'
+            )
+        if value.startswith(reverse('batch')):
+            raise serializers.ValidationError('Вложенные пакеты запрещены.')
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """Пакет GET-подзапросов."""
+
+    requests = BatchItemSerializer(
+        many=True, allow_empty=False, max_length=BATCH_MAX_REQUESTS
+    )
+    parallel = serializers.BooleanField(default=False)
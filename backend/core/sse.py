@@ -0,0 +1,155 @@
+"""
+Поток событий пользователя в формате Server-Sent Events.
+
+`/api/events/` обслуживается ASGI-приложением `events_app` в обход
+обработчика Django: тот держит поток на каждый открытый запрос и не
+замечает отключения клиента, пока ответ стримится. Здесь открытый поток
+стоит одну корутину и очередь, а БД нужна только для проверки токена.
+Клиент передаёт токен заголовком `Authorization: Token <key>`. EventSource
+в браузере заголовки не отправляет, поэтому он сначала получает
+короткоживущий билет `POST /api/events/ticket/` и передаёт его параметром
+`?ticket=`: постоянный токен в URL не попадает.
+"""
+import asyncio
+from urllib.parse import parse_qs
+
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+
+from backend.settings import (
+    SSE_AUTH_CONCURRENCY, SSE_HEARTBEAT, SSE_MAX_AGE, SSE_RETRY
+)
+from .authentication import ticket_user, token_user
+from .events import broker
+from .renderers import dumps
+
+EVENTS_PATH = '/api/events/'
+
+STREAM_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+auth_slots = None
+
+
+def request_credentials(scope):
+    """
+    Пара (функция проверки, значение) для токена из заголовка или
+    билета из строки запроса; None без учётных данных.
+    """
+    for name, value in scope['headers']:
+        if name == b'authorization':
+            header = value.decode('latin-1').split()
+            if not header or header[0].lower() != 'token':
+                break
+            if len(header) != 2:
+                raise AuthenticationFailed(
+                    'Invalid token header. No credentials provided.'
+                )
+            return token_user, header[1]
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    if 'ticket' in query:
+        return ticket_user, query['ticket'][0]
+    return None
+
+
+def find_user(check, value):
+    # Как для обычного запроса: соединение закрывается после проверки
+    # (в сервисе `events` CONN_MAX_AGE=0), а потоков в пуле ограниченное
+    # число.
+    close_old_connections()
+    try:
+        return check(value)
+    finally:
+        close_old_connections()
+
+
+async def authenticate(scope):
+    """Пользователь потока; число одновременных запросов к БД ограничено."""
+    global auth_slots
+    credentials = request_credentials(scope)
+    if credentials is None:
+        raise AuthenticationFailed(
+            'Authentication credentials were not provided.'
+        )
+    if auth_slots is None:
+        auth_slots = asyncio.Semaphore(SSE_AUTH_CONCURRENCY)
+    async with auth_slots:
+        return await asyncio.to_thread(find_user, *credentials)
+
+
+def event_text(message):
+    data = dumps(message['data']).decode()
+    return f'event: {message["event"]}\ndata: {data}\n\n'
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream(user_id, send, receive):
+    """Отдаёт события до отключения клиента или истечения SSE_MAX_AGE."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SSE_MAX_AGE
+    queue = await broker.subscribe(user_id)
+    disconnect = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': STREAM_HEADERS,
+        })
+        chunk = f'retry: {SSE_RETRY}\n\n'
+        while True:
+            await send({
+                'type': 'http.response.body',
+                'body': chunk.encode(),
+                'more_body': True,
+            })
+            timeout = min(SSE_HEARTBEAT, deadline - loop.time())
+            if timeout <= 0:
+                break
+            message = asyncio.ensure_future(queue.get())
+            await asyncio.wait(
+                {message, disconnect},
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnect.done():
+                message.cancel()
+                return
+            if message.done():
+                chunk = event_text(message.result())
+            else:
+                message.cancel()
+                chunk = ': ping\n\n'
+                # Восстанавливает LISTEN, если соединение с БД упало.
+                await broker.listen()
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnect.cancel()
+        broker.unsubscribe(user_id, queue)
+
+
+async def events_app(scope, receive, send):
+    """ASGI-приложение `/api/events/`."""
+    try:
+        user = await authenticate(scope)
+    except AuthenticationFailed as error:
+        await send({
+            'type': 'http.response.start',
+            'status': 401,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'www-authenticate', b'Token'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': dumps({'detail': str(error.detail)}),
+        })
+        return
+    await stream(user.pk, send, receive)
@@ -0,0 +1,22 @@
+from django.test import SimpleTestCase
+
+from backend.settings import STARTUP_TIME_BUDGET
+from core.management.commands.profile_startup import BOOT, Command
+
+REPEAT = 3
+
+
+class StartupTests(SimpleTestCase):
+    """Старт воркеров укладывается в бюджет и не тянет тяжёлые пакеты."""
+
+    def test_boot(self):
+        command = Command()
+        for app in BOOT:
+            with self.subTest(app=app):
+                runs = [command.boot(app) for _ in range(REPEAT)]
+                self.assertLess(
+                    min(elapsed for elapsed, _, _ in runs),
+                    STARTUP_TIME_BUDGET,
+                )
+                # numpy и другие пакеты из STARTUP_LAZY_MODULES.
+                self.assertEqual(runs[0][1], [])
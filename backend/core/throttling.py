@@ -0,0 +1,101 @@
+"""
+Ограничение частоты запросов по алгоритму token bucket.
+
+Каждому клиенту в каждой области (scope) соответствует корзина на
+`num` токенов из DEFAULT_THROTTLE_RATES ('num/period'), которая
+пополняется со скоростью num / period токенов в секунду. Запрос
+забирает один токен. Пополнение и списание выполняются одним
+`INSERT ... ON CONFLICT DO UPDATE` в нежурналируемой таблице, поэтому
+состояние общее для всех воркеров gunicorn и не требует Redis.
+
+Область задаётся атрибутом представления `throttle_scope` или,
+для отдельных действий viewset, словарём `throttle_scopes`.
+"""
+import random
+
+from django.db import connection
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from backend.settings import (THROTTLE_BUCKET_IDLE_TTL,
+                              THROTTLE_PRUNE_PROBABILITY)
+from .models import ThrottleBucket
+
+TABLE = ThrottleBucket._meta.db_table
+REFILLED = (
+    f'LEAST(%(capacity)s, {TABLE}.tokens + %(rate)s * EXTRACT(EPOCH FROM '
+    f'clock_timestamp() - {TABLE}.updated_at))'
+)
+TAKE_TOKEN_SQL = f"""
+    INSERT INTO {TABLE} (key, tokens, allowed, updated_at)
+    VALUES (%(key)s, %(capacity)s - 1, true, clock_timestamp())
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = CASE WHEN {REFILLED} >= 1
+            THEN {REFILLED} - 1 ELSE {REFILLED} END,
+        allowed = {REFILLED} >= 1,
+        updated_at = clock_timestamp()
+    RETURNING allowed, tokens
+"""
+PRUNE_SQL = f"""
+    DELETE FROM {TABLE}
+    WHERE updated_at < clock_timestamp() - %s * INTERVAL '1 second'
+"""
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'100/min' -> (ёмкость корзины, токенов в секунду)."""
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def take_token(key, capacity, rate):
+    """Забирает токен из корзины; возвращает (разрешено, остаток)."""
+    with connection.cursor() as cursor:
+        if random.random() < THROTTLE_PRUNE_PROBABILITY:
+            cursor.execute(PRUNE_SQL, [THROTTLE_BUCKET_IDLE_TTL])
+        cursor.execute(
+            TAKE_TOKEN_SQL,
+            {'key': key, 'capacity': capacity, 'rate': rate}
+        )
+        return cursor.fetchone()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение по пользователю, а для анонимов — по IP-адресу."""
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(
+            getattr(view, 'action', None),
+            getattr(view, 'throttle_scope', None)
+        )
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+        self.capacity, self.rate = parse_rate(rate)
+        allowed, self.tokens = take_token(
+            f'{scope}:{self.get_cache_key(request, view)}',
+            self.capacity, self.rate
+        )
+        return allowed
+
+    def wait(self):
+        """Секунды до появления следующего токена (для Retry-After)."""
+        return (1 - self.tokens) / self.rate
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Ограничение по IP-адресу независимо от аутентификации."""
+
+    def get_cache_key(self, request, view):
+        return f'ip:{self.get_ident(request)}'
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .views import batch, db_pool_stats, events_ticket, live, ready
+
+urlpatterns = [
+    path('health/live/', live, name='health-live'),
+    path('health/ready/', ready, name='health-ready'),
+    path('metrics/db/', db_pool_stats, name='metrics-db'),
+    path('batch/', batch, name='batch'),
+    path('events/ticket/', events_ticket, name='events-ticket'),
+]
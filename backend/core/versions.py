@@ -0,0 +1,26 @@
+"""
+Версии данных для ключей кэша.
+
+Версия входит в ключ кэша, а при изменении данных увеличивается в
+базе: все процессы сразу начинают читать новые ключи, а записи со
+старыми версиями истекают сами. Так кэш остаётся верным и с
+локальным для процесса бэкендом (LocMemCache).
+"""
+from django.db.models import F
+
+from .models import CacheVersion
+
+
+def cache_version(name):
+    """Текущая версия данных `name`: один запрос по первичному ключу."""
+    return CacheVersion.objects.filter(name=name).values_list(
+        'version', flat=True
+    ).first() or 0
+
+
+def bump_cache_version(name):
+    """Увеличивает версию данных `name`."""
+    if not CacheVersion.objects.filter(name=name).update(
+        version=F('version') + 1
+    ):
+        CacheVersion.objects.get_or_create(name=name, defaults={'version': 1})
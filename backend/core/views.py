@@ -0,0 +1,76 @@
+from django.db import DatabaseError, connection
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+
+from backend.settings import SSE_TICKET_MAX_AGE
+from .authentication import issue_ticket
+from .backends.postgresql.base import pool_stats
+from .batch import run_batch
+from .renderers import dumps
+from .serializers import BatchSerializer
+from .warmup import try_warm_up
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def db_pool_stats(request):
+    """Метрики постоянных соединений с БД текущего процесса."""
+    return Response(pool_stats.snapshot())
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def batch(request):
+    """
+    Выполняет несколько GET-запросов к API за один запрос.
+
+    Права и фильтры проверяются представлением каждого подзапроса.
+    Ответы возвращаются в порядке подзапросов.
+    """
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return HttpResponse(
+        run_batch(
+            request,
+            [item['path'] for item in serializer.validated_data['requests']],
+            serializer.validated_data['parallel'],
+        ),
+        content_type='application/json',
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def events_ticket(request):
+    """Билет для подключения к потоку событий `/api/events/?ticket=`."""
+    return Response({
+        'ticket': issue_ticket(request.user),
+        'expires_in': SSE_TICKET_MAX_AGE,
+    })
+
+
+def health_response(state, status=200):
+    return HttpResponse(
+        dumps({'status': state}),
+        status=status,
+        content_type='application/json',
+    )
+
+
+def live(request):
+    """Проверка живости: процесс отвечает на запросы."""
+    return health_response('ok')
+
+
+def ready(request):
+    """Проверка готовности: прогрев завершён и база данных доступна."""
+    if not try_warm_up():
+        return health_response('warming_up', status=503)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        return health_response('database_unavailable', status=503)
+    return health_response('ok')
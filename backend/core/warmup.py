@@ -0,0 +1,52 @@
+"""
+Прогрев процесса перед приёмом запросов.
+
+Разрешает URL-конфигурации (регулярные выражения и словари reverse
+строятся лениво при первом запросе) и загружает в кэш списки тегов и
+ингредиентов. В gunicorn прогрев выполняется в мастер-процессе после
+preload приложения, и воркеры получают готовое состояние при fork;
+в ASGI — на событии lifespan startup. Если база данных ещё недоступна,
+прогрев повторяется при проверке готовности.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import close_caches
+from django.db import DatabaseError, connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+URLCONFS = (settings.ROOT_URLCONF, 'backend.urls_async')
+
+warmed_up = threading.Event()
+
+
+def warm_up():
+    """Прогревает процесс; повторный вызов ничего не делает."""
+    if warmed_up.is_set():
+        return
+    from recipes.reference import cached_ingredients, cached_tags
+
+    started = time.perf_counter()
+    for urlconf in URLCONFS:
+        get_resolver(urlconf).reverse_dict
+    cached_tags()
+    cached_ingredients()
+    # Соединения мастер-процесса не должны достаться воркерам после fork.
+    connections.close_all()
+    close_caches()
+    warmed_up.set()
+    logger.info('Прогрев завершён за %.2f с', time.perf_counter() - started)
+
+
+def try_warm_up():
+    """Прогревает процесс; False, если база данных недоступна."""
+    try:
+        warm_up()
+    except DatabaseError:
+        logger.warning('Прогрев не удался: база данных недоступна')
+        return False
+    return True
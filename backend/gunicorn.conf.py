@@ -0,0 +1,53 @@
+"""
+Настройки gunicorn для продакшена.
+
+Число воркеров считается по ядрам, доступным контейнеру (affinity и
+квота CPU cgroup), каждый воркер обслуживает запросы в нескольких
+потоках, так что долгая выгрузка списка покупок не блокирует остальных.
+Приложение загружается в мастер-процессе (preload) и прогревается
+в `when_ready`: воркеры получают импортированные модули и кэши при fork
+без копирования. Все значения переопределяются переменными окружения
+GUNICORN_*.
+"""
+import math
+import os
+
+
+def available_cores():
+    """Ядра, доступные процессу, с учётом квоты CPU cgroup v2."""
+    cores = len(os.sched_getaffinity(0))
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as file:
+            quota, period = file.read().split()
+    except (OSError, ValueError):
+        return cores
+    if quota == 'max':
+        return cores
+    return max(1, min(cores, math.ceil(int(quota) / int(period))))
+
+
+cores = available_cores()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('GUNICORN_WORKERS', cores * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Перезапуск воркеров ограничивает рост памяти; новые воркеры
+# создаются из уже прогретого мастера.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+if os.path.isdir('/dev/shm'):
+    # Файлы heartbeat воркеров на overlayfs контейнера могут тормозить.
+    worker_tmp_dir = '/dev/shm'
+
+
+def when_ready(server):
+    from core.warmup import try_warm_up
+
+    if try_warm_up():
+        server.log.info('Приложение прогрето')
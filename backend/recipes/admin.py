@@ -1,6 +1,10 @@
 from django.contrib import admin
 
-from .models import Cart, Ingredient, Recipe, RecipeIngredient, Tag
+from core.admin import changelist_link, count_subquery
+from .models import (Cart, Favorite, Ingredient, Recipe, RecipeIngredient,
+                     Tag, UnitConversion)
+from .pantry import update_ingredient_set
+from .similarity import update_recipe_signature
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -8,11 +12,17 @@ class RecipeIngredientInline(admin.TabularInline):
 
     model = RecipeIngredient
     extra = 1
+    autocomplete_fields = ('ingredient',)
     fields = (
         'ingredient',
         'amount',
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'recipe', 'ingredient'
+        )
+
 
 class RecipeAdmin(admin.ModelAdmin):
     """Отображение рецептов в админке."""
@@ -24,19 +34,42 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     list_filter = (
         'tags',
-        'author__first_name',
     )
     list_display = (
         'id',
         'name',
         'author',
+        'favorites_count',
+        'popularity',
         'created_at',
         'updated_at',
     )
+    list_select_related = ('author',)
+    autocomplete_fields = ('author',)
+    show_full_result_count = False
     inlines = (
         RecipeIngredientInline,
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_count=count_subquery(Favorite.objects, 'recipe')
+        )
+
+    @admin.display(description='В избранном', ordering='favorites_count')
+    def favorites_count(self, obj):
+        return changelist_link(Favorite, obj.favorites_count, recipe=obj.id)
+
+    def save_related(self, request, form, formsets, change):
+        """Обновляет индексы ингредиентов после сохранения inline-форм."""
+        super().save_related(request, form, formsets, change)
+        recipe = form.instance
+        ingredient_ids = list(
+            recipe.ingredients.values_list('ingredient_id', flat=True)
+        )
+        update_recipe_signature(recipe.id, ingredient_ids)
+        update_ingredient_set(recipe.id, ingredient_ids)
+
 
 class TagAdmin(admin.ModelAdmin):
     """Отображение тегов в админке."""
@@ -62,15 +95,13 @@ class IngredientAdmin(admin.ModelAdmin):
     )
 
 
-class RecipeInline(admin.TabularInline):
-    """Inline-добавление рецептов в корзину."""
+class UnitConversionAdmin(admin.ModelAdmin):
+    """Отображение переводов единиц измерения в админке."""
 
-    model = Recipe
-    extra = 1
-    fields = (
-        'name',
-        'description',
-        'author',
+    list_display = (
+        'unit',
+        'base_unit',
+        'factor',
     )
 
 
@@ -79,12 +110,40 @@ class CartAdmin(admin.ModelAdmin):
 
     list_display = (
         'user',
+        'recipes_count',
+        'created_at',
+    )
+    list_select_related = ('user',)
+    search_fields = ('user__email', 'user__username')
+    raw_id_fields = ('user', 'recipes')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipes_count=count_subquery(Cart.recipes.through.objects, 'cart')
+        )
+
+    @admin.display(description='Рецептов', ordering='recipes_count')
+    def recipes_count(self, obj):
+        return obj.recipes_count
+
+
+class FavoriteAdmin(admin.ModelAdmin):
+    """Отображение избранных рецептов в админке."""
+
+    list_display = (
+        'user',
+        'recipe',
         'created_at',
     )
-    inlines = (RecipeInline,)
+    list_select_related = ('user', 'recipe__author')
+    search_fields = ('user__email', 'recipe__name')
+    raw_id_fields = ('user', 'recipe')
+    show_full_result_count = False
 
 
-admin.site.register(Cart)
+admin.site.register(Cart, CartAdmin)
+admin.site.register(Favorite, FavoriteAdmin)
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(Tag, TagAdmin)
+admin.site.register(UnitConversion, UnitConversionAdmin)
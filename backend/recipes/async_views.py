@@ -0,0 +1,373 @@
+"""
+Асинхронные представления для чтения рецептов, тегов и ингредиентов.
+
+Подключаются только в ASGI-развёртывании (см. `backend/asgi.py`) и
+повторяют ответы соответствующих синхронных представлений DRF.
+Запросы с другими методами передаются синхронным представлениям.
+"""
+import functools
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import resolve
+from django_filters.utils import translate_validation
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+
+from core.authentication import aauthenticate
+from core.pagination import CustomPageNumberPagination
+from core.renderers import dumps
+from core.serializers import sparse_fields
+from core.throttling import TokenBucketThrottle
+from .facets import facets_requested, recipe_facets
+from .filters import IngredientFilter, RecipeFilter
+from .models import Ingredient, Recipe, Tag
+from .reference import cached_ingredients, cached_tags
+from .sql_json import available, page_json, render_recipes
+from .utils import (RECIPE_FIELDS, format_shopping_list_line,
+                    get_ingredients_from_cart, recipe_read_queryset,
+                    sideload_fields, sideloaded)
+
+
+def async_read_view(view):
+    """
+    Аутентифицирует GET-запросы по токену и передаёт остальные
+    методы синхронному представлению из ROOT_URLCONF.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            match = resolve(request.path_info, urlconf=settings.ROOT_URLCONF)
+            return await sync_to_async(match.func)(
+                request, *match.args, **match.kwargs
+            )
+        try:
+            request.user = await aauthenticate(request)
+        except AuthenticationFailed as error:
+            return json_response({'detail': str(error.detail)}, status=401)
+        return await view(request, *args, **kwargs)
+    # csrf_exempt в Django 4.2 не поддерживает корутины.
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        dumps(data), status=status, content_type='application/json'
+    )
+
+
+def not_found(model):
+    return json_response(
+        {'detail': f'No {model._meta.object_name} matches the given query.'},
+        status=404
+    )
+
+
+def not_authenticated():
+    return json_response(
+        {'detail': 'Authentication credentials were not provided.'},
+        status=401
+    )
+
+
+async def throttled(request, scope):
+    """Ответ 429, если клиент исчерпал лимит запросов области `scope`."""
+    throttle = TokenBucketThrottle()
+    view = SimpleNamespace(throttle_scope=scope)
+    if await sync_to_async(throttle.allow_request)(request, view):
+        return None
+    error = Throttled(throttle.wait())
+    response = json_response({'detail': str(error.detail)}, status=429)
+    response['Retry-After'] = str(error.wait)
+    return response
+
+
+def file_url(request, field):
+    """Абсолютная ссылка на файл, как в `serializers.ImageField`."""
+    if not field:
+        return None
+    return request.build_absolute_uri(field.url)
+
+
+def tag_payload(tag):
+    return {'id': tag.id, 'name': tag.name, 'slug': tag.slug}
+
+
+def ingredient_payload(ingredient):
+    return {
+        'id': ingredient.id,
+        'name': ingredient.name,
+        'measurement_unit': ingredient.measurement_unit,
+    }
+
+
+def author_payload(request, recipe):
+    author = recipe.author
+    return {
+        'email': author.email,
+        'id': author.id,
+        'username': author.username,
+        'first_name': author.first_name,
+        'last_name': author.last_name,
+        'is_subscribed': getattr(recipe, 'viewer_subscribed', False),
+        'avatar': file_url(request, author.avatar),
+    }
+
+
+RECIPE_GETTERS = {
+    'id': lambda request, recipe: recipe.id,
+    'tags': lambda request, recipe: [
+        tag_payload(tag) for tag in recipe.tags.all()
+    ],
+    'tag_ids': lambda request, recipe: [
+        tag.id for tag in recipe.tags.all()
+    ],
+    'author': author_payload,
+    'author_id': lambda request, recipe: recipe.author_id,
+    'ingredients': lambda request, recipe: [
+        {
+            'id': item.id,
+            'amount': item.amount,
+            'name': item.ingredient.name,
+            'measurement_unit': item.ingredient.measurement_unit,
+        }
+        for item in recipe.ingredients.all()
+    ],
+    'is_favorited': lambda request, recipe: getattr(
+        recipe, 'viewer_favorited', False
+    ),
+    'is_in_shopping_cart': lambda request, recipe: getattr(
+        recipe, 'viewer_in_cart', False
+    ),
+    'name': lambda request, recipe: recipe.name,
+    'image': lambda request, recipe: file_url(request, recipe.image),
+    'text': lambda request, recipe: recipe.text,
+    'cooking_time': lambda request, recipe: recipe.cooking_time,
+}
+
+
+def recipe_payload(request, recipe, fields=RECIPE_FIELDS):
+    """Представление рецепта, совпадающее с `RecipeReadSerializer`."""
+    return {name: RECIPE_GETTERS[name](request, recipe) for name in fields}
+
+
+def included_payload(request, recipes, sideload):
+    """Связи страницы рецептов для `included`, как в `RecipeView`."""
+    included = {}
+    if 'users' in sideload:
+        users = {}
+        for recipe in recipes:
+            if recipe.author_id not in users:
+                users[recipe.author_id] = author_payload(request, recipe)
+        included['users'] = users
+    if 'tags' in sideload:
+        included['tags'] = {
+            tag.id: tag_payload(tag)
+            for recipe in recipes for tag in recipe.tags.all()
+        }
+    return included
+
+
+def recipe_queryset(request, queryset):
+    """Рецепты с данными для полей из ?fields= и ?omit=."""
+    fields = sparse_fields(request, RECIPE_FIELDS)
+    return recipe_read_queryset(queryset, request.user, fields), fields
+
+
+@sync_to_async
+def filter_queryset(filterset):
+    """Валидирует параметры фильтра; возвращает None при ошибке."""
+    if not filterset.is_valid():
+        return None
+    return filterset.qs
+
+
+def validation_errors(filterset):
+    """Ошибки фильтра в формате ответа DRF: {поле: [сообщения]}."""
+    return translate_validation(filterset.errors).detail
+
+
+async def paginate(request, queryset, to_payload, to_included=None,
+                   render=None, extra=None):
+    """
+    Постраничный вывод `CustomPageNumberPagination`: размер и номер
+    страницы (включая `last`) разбираются самим пагинатором DRF, а
+    число объектов и страница загружаются асинхронно.
+    `to_included` строит `included` по объектам страницы, а `render`,
+    если задан, возвращает готовый JSON результатов вместо `to_payload`.
+    `extra` добавляется в ответ как есть.
+    """
+    paginator = CustomPageNumberPagination()
+    paginator.request = request
+    params = SimpleNamespace(query_params=request.GET)
+    pages = paginator.django_paginator_class(
+        queryset, paginator.get_page_size(params)
+    )
+    # Paginator кэширует count: подставляем значение из acount().
+    pages.count = await queryset.acount()
+    page_number = paginator.get_page_number(params, pages)
+    try:
+        paginator.page = pages.page(page_number)
+    except InvalidPage as error:
+        message = paginator.invalid_page_message.format(
+            page_number=page_number, message=str(error)
+        )
+        return json_response({'detail': message}, status=404)
+    objects = [obj async for obj in paginator.page.object_list]
+    count = pages.count
+    next_url = paginator.get_next_link()
+    previous_url = paginator.get_previous_link()
+    if render is not None:
+        return HttpResponse(
+            page_json(
+                count, next_url, previous_url, await render(objects), extra
+            ),
+            content_type='application/json',
+        )
+    data = {
+        'count': count,
+        'next': next_url,
+        'previous': previous_url,
+        'results': [to_payload(obj) for obj in objects],
+    }
+    if to_included is not None:
+        data['included'] = to_included(objects)
+    data.update(extra or {})
+    return json_response(data)
+
+
+@async_read_view
+async def recipe_list(request):
+    """Список рецептов с фильтрацией и пагинацией."""
+    filterset = RecipeFilter(
+        request.GET, queryset=Recipe.objects.all(), request=request
+    )
+    queryset = await filter_queryset(filterset)
+    if queryset is None:
+        return json_response(validation_errors(filterset), status=400)
+    queryset, fields = recipe_queryset(request, queryset)
+    sideload = sideloaded(request, fields)
+    extra = {}
+    if facets_requested(request):
+        extra['facets'] = await sync_to_async(recipe_facets)(request)
+    if available() and not sideload:
+        return await paginate(
+            request,
+            queryset.prefetch_related(None).values_list('pk', flat=True),
+            None,
+            render=functools.partial(
+                sync_to_async(render_recipes), request, fields=fields
+            ),
+            extra=extra,
+        )
+    fields = sideload_fields(fields, sideload)
+    return await paginate(
+        request,
+        queryset,
+        lambda recipe: recipe_payload(request, recipe, fields),
+        (
+            (lambda recipes: included_payload(request, recipes, sideload))
+            if sideload else None
+        ),
+        extra=extra,
+    )
+
+
+@async_read_view
+async def recipe_detail(request, pk):
+    """Получить рецепт по идентификатору."""
+    queryset, fields = recipe_queryset(
+        request, Recipe.objects.filter(pk=pk)
+    )
+    if available():
+        content = await sync_to_async(render_recipes)(request, [pk], fields)
+        if content == b'[]':
+            return not_found(Recipe)
+        return HttpResponse(content[1:-1], content_type='application/json')
+    try:
+        recipe = await queryset.aget()
+    except Recipe.DoesNotExist:
+        return not_found(Recipe)
+    return json_response(recipe_payload(request, recipe, fields))
+
+
+@async_read_view
+async def recipe_by_short_url(request, short_url):
+    """Получить рецепт по короткой ссылке."""
+    if not request.user.is_authenticated:
+        return not_authenticated()
+    queryset, fields = recipe_queryset(
+        request, Recipe.objects.filter(short_url=short_url)
+    )
+    try:
+        recipe = await queryset.aget()
+    except Recipe.DoesNotExist:
+        return not_found(Recipe)
+    return json_response(recipe_payload(request, recipe, fields))
+
+
+@async_read_view
+async def download_shopping_cart(request):
+    """Скачать список ингредиентов из корзины."""
+    if not request.user.is_authenticated:
+        return not_authenticated()
+    if response := await throttled(request, 'shopping_list'):
+        return response
+    ingredients = get_ingredients_from_cart(request.user)
+
+    async def lines():
+        async for item in ingredients.aiterator():
+            yield format_shopping_list_line(item)
+
+    response = StreamingHttpResponse(lines(), content_type='text/plain')
+    response['Content-Disposition'] = (
+        'attachment; filename="shopping_list.txt"'
+    )
+    return response
+
+
+@async_read_view
+async def tag_list(request):
+    """Список тегов."""
+    return json_response(await sync_to_async(cached_tags)())
+
+
+@async_read_view
+async def tag_detail(request, pk):
+    """Получить тег по идентификатору."""
+    try:
+        tag = await Tag.objects.aget(pk=pk)
+    except Tag.DoesNotExist:
+        return not_found(Tag)
+    return json_response(tag_payload(tag))
+
+
+@async_read_view
+async def ingredient_list(request):
+    """Список ингредиентов с поиском по названию."""
+    if response := await throttled(request, 'ingredients'):
+        return response
+    if not request.GET.get('name'):
+        return json_response(await sync_to_async(cached_ingredients)())
+    filterset = IngredientFilter(
+        request.GET, queryset=Ingredient.objects.all(), request=request
+    )
+    queryset = await filter_queryset(filterset)
+    if queryset is None:
+        return json_response(validation_errors(filterset), status=400)
+    return json_response(
+        [ingredient_payload(item) async for item in queryset]
+    )
+
+
+@async_read_view
+async def ingredient_detail(request, pk):
+    """Получить ингредиент по идентификатору."""
+    try:
+        ingredient = await Ingredient.objects.aget(pk=pk)
+    except Ingredient.DoesNotExist:
+        return not_found(Ingredient)
+    return json_response(ingredient_payload(ingredient))
@@ -0,0 +1,159 @@
+"""
+Журнал изменений рецептов, избранного и корзины для дельта-синхронизации.
+
+Изменения пишутся сигналами в таблицу `Change` с номером транзакции.
+Курсор синхронизации — пара (txid, id) последнего отданного изменения.
+Отдаются только изменения транзакций младше xmin текущего снимка: они
+уже завершены, и новые записи с меньшим txid появиться не могут.
+Поэтому при движении курсора изменения не теряются, даже если
+транзакции фиксируются не в порядке номеров.
+"""
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import BigIntegerField, Func, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from backend.settings import CHANGES_PAGE_SIZE
+from .models import Cart, Change, Favorite, Recipe
+
+
+class CurrentTransactionId(Func):
+    template = 'pg_current_xact_id()::text::bigint'
+    output_field = BigIntegerField()
+
+
+def record(kind, action, recipe_id, user_id=None):
+    """Записывает изменение, заменяя предыдущее для того же объекта."""
+    Change.objects.filter(
+        kind=kind, recipe_id=recipe_id, user_id=user_id
+    ).delete()
+    Change.objects.create(
+        kind=kind,
+        action=action,
+        recipe_id=recipe_id,
+        user_id=user_id,
+        txid=CurrentTransactionId(),
+    )
+
+
+def record_many(kind, action, pairs):
+    """`record` для многих пар (рецепт, пользователь) сразу."""
+    recipes_by_user = defaultdict(set)
+    for recipe_id, user_id in pairs:
+        recipes_by_user[user_id].add(recipe_id)
+    for user_id, recipe_ids in recipes_by_user.items():
+        Change.objects.filter(
+            kind=kind, recipe_id__in=recipe_ids, user_id=user_id
+        ).delete()
+    Change.objects.bulk_create(
+        Change(
+            kind=kind,
+            action=action,
+            recipe_id=recipe_id,
+            user_id=user_id,
+            txid=CurrentTransactionId(),
+        )
+        for user_id, recipe_ids in recipes_by_user.items()
+        for recipe_id in recipe_ids
+    )
+
+
+def parse_cursor(value):
+    """Курсор вида `txid.id`; ValueError при неверном формате."""
+    txid, change_id = value.split('.')
+    return int(txid), int(change_id)
+
+
+def snapshot_xmin():
+    """Наименьший номер транзакции, которая ещё может быть не завершена."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+        )
+        return cursor.fetchone()[0]
+
+
+def changes_since(cursor, user, limit=CHANGES_PAGE_SIZE):
+    """
+    Изменения после `cursor`, видимые пользователю, и новый курсор.
+
+    Без курсора возвращается только курсор текущего момента: клиент
+    загружает данные целиком и дальше синхронизируется от него.
+    Третье значение — остались ли ещё изменения.
+    """
+    xmin = snapshot_xmin()
+    if cursor is None:
+        return [], f'{xmin}.0', False
+    txid, change_id = cursor
+    visible = Q(user=None)
+    if user.is_authenticated:
+        visible |= Q(user=user)
+    changes = list(
+        Change.objects
+        .filter(visible, txid__gte=txid, txid__lt=xmin)
+        .exclude(txid=txid, id__lte=change_id)
+        .order_by('txid', 'id')[:limit + 1]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        txid, change_id = changes[-1].txid, changes[-1].id
+    return changes, f'{txid}.{change_id}', has_more
+
+
+@receiver(post_save, sender=Recipe)
+def record_recipe_save(sender, instance, **kwargs):
+    record(Change.RECIPE, Change.UPSERT, instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def record_recipe_delete(sender, instance, **kwargs):
+    record(Change.RECIPE, Change.DELETE, instance.pk)
+
+
+@receiver(post_save, sender=Favorite)
+def record_favorite_add(sender, instance, created, **kwargs):
+    if created and instance.recipe_id is not None:
+        record(
+            Change.FAVORITE, Change.UPSERT,
+            instance.recipe_id, instance.user_id
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def record_favorite_delete(sender, instance, **kwargs):
+    if instance.recipe_id is not None:
+        record(
+            Change.FAVORITE, Change.DELETE,
+            instance.recipe_id, instance.user_id
+        )
+
+
+def cart_pairs(instance, reverse, pk_set):
+    """Пары (рецепт, пользователь), затронутые изменением корзин."""
+    if reverse:
+        carts = (
+            instance.carts.all() if pk_set is None
+            else Cart.objects.filter(pk__in=pk_set)
+        )
+        return [
+            (instance.pk, user_id)
+            for user_id in carts.values_list('user_id', flat=True)
+        ]
+    recipe_ids = (
+        instance.recipes.values_list('pk', flat=True) if pk_set is None
+        else pk_set
+    )
+    return [(recipe_id, instance.user_id) for recipe_id in recipe_ids]
+
+
+@receiver(m2m_changed, sender=Cart.recipes.through)
+def record_cart_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Добавление и удаление рецептов в корзине с любой стороны связи."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    change = Change.UPSERT if action == 'post_add' else Change.DELETE
+    for recipe_id, user_id in cart_pairs(instance, reverse, pk_set):
+        record(Change.CART, change, recipe_id, user_id)
@@ -0,0 +1,49 @@
+"""События SSE об изменениях корзины, избранного и подписок."""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.events import publish
+from users.models import Subscription
+from .changes import cart_pairs
+from .models import Cart, Favorite
+
+
+@receiver(post_save, sender=Favorite)
+def notify_favorite_add(sender, instance, created, **kwargs):
+    if created and instance.recipe_id is not None:
+        publish(instance.user_id, 'favorite', {
+            'recipe': instance.recipe_id, 'is_favorited': True
+        })
+
+
+@receiver(post_delete, sender=Favorite)
+def notify_favorite_delete(sender, instance, **kwargs):
+    if instance.recipe_id is not None:
+        publish(instance.user_id, 'favorite', {
+            'recipe': instance.recipe_id, 'is_favorited': False
+        })
+
+
+@receiver(m2m_changed, sender=Cart.recipes.through)
+def notify_cart_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    for recipe_id, user_id in cart_pairs(instance, reverse, pk_set):
+        publish(user_id, 'shopping_cart', {
+            'recipe': recipe_id, 'is_in_shopping_cart': action == 'post_add'
+        })
+
+
+@receiver(post_save, sender=Subscription)
+def notify_subscribe(sender, instance, created, **kwargs):
+    if created:
+        publish(instance.subscriber_id, 'subscription', {
+            'author': instance.subscribed_to_id, 'is_subscribed': True
+        })
+
+
+@receiver(post_delete, sender=Subscription)
+def notify_unsubscribe(sender, instance, **kwargs):
+    publish(instance.subscriber_id, 'subscription', {
+        'author': instance.subscribed_to_id, 'is_subscribed': False
+    })
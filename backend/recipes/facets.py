@@ -0,0 +1,110 @@
+"""
+Фасеты списка рецептов: число рецептов по тегам и по интервалам
+времени приготовления при текущих фильтрах `RecipeFilter`.
+
+Теги в фильтре объединяются через «или», поэтому счётчики тегов
+считаются без фильтра по тегам: рядом с тегом показывается, сколько
+рецептов с ним подходит под остальные фильтры.
+Обе группы считаются одним запросом (UNION ALL двух GROUP BY).
+Для анонимов фасеты кэшируются по набору фильтров.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, F, Value, When
+from django.db.models.functions import Cast
+from django.http import QueryDict
+from django.utils.http import urlencode
+
+from backend.settings import COOKING_TIME_BUCKETS, FACETS_CACHE_TIMEOUT
+from .filters import RecipeFilter
+from .models import Recipe
+
+TAGS = 'tags'
+COOKING_TIME = 'cooking_time'
+
+
+def facets_requested(request):
+    return request.GET.get('facets', '').lower() in ('1', 'true')
+
+
+def filter_params(data):
+    """Параметры фильтров без сортировки: на счётчики она не влияет."""
+    return [
+        (name, sorted(data.getlist(name)))
+        for name in RecipeFilter.base_filters
+        if name != 'ordering' and name in data
+    ]
+
+
+def filtered_ids(params, request):
+    data = QueryDict(mutable=True)
+    for name, values in params:
+        data.setlist(name, values)
+    return RecipeFilter(
+        data, queryset=Recipe.objects.all(), request=request
+    ).qs.order_by().values('pk')
+
+
+def cooking_time_bucket():
+    return Case(
+        *(
+            When(cooking_time__lte=upper, then=Value(index))
+            for index, upper in enumerate(COOKING_TIME_BUCKETS)
+        ),
+        default=Value(len(COOKING_TIME_BUCKETS)),
+    )
+
+
+def count_facets(params, request):
+    """Словарь фасетов, посчитанный одним запросом."""
+    untagged = [(name, values) for name, values in params if name != TAGS]
+    tags = (
+        Recipe.tags.through.objects
+        .filter(recipe__in=filtered_ids(untagged, request))
+        .annotate(kind=Value(TAGS), key=F('tag__slug'))
+        .values('kind', 'key')
+        .annotate(count=Count('*'))
+        .order_by()
+    )
+    times = (
+        Recipe.objects
+        .filter(pk__in=filtered_ids(params, request))
+        .annotate(
+            kind=Value(COOKING_TIME),
+            key=Cast(cooking_time_bucket(), CharField()),
+        )
+        .values('kind', 'key')
+        .annotate(count=Count('*'))
+        .order_by()
+    )
+    counts = {TAGS: {}, COOKING_TIME: {}}
+    for row in tags.union(times, all=True):
+        counts[row['kind']][row['key']] = row['count']
+    bounds = (0, *COOKING_TIME_BUCKETS, None)
+    return {
+        TAGS: dict(sorted(counts[TAGS].items())),
+        COOKING_TIME: [
+            {
+                'min': lower + 1,
+                'max': upper,
+                'count': counts[COOKING_TIME].get(str(index), 0),
+            }
+            for index, (lower, upper) in enumerate(zip(bounds, bounds[1:]))
+        ],
+    }
+
+
+def recipe_facets(request):
+    """Фасеты для фильтров из запроса; для анонимов берутся из кэша."""
+    params = filter_params(request.GET)
+    if request.user.is_authenticated:
+        return count_facets(params, request)
+    key = 'recipe_facets:' + hashlib.md5(
+        urlencode(params, doseq=True).encode()
+    ).hexdigest()
+    facets = cache.get(key)
+    if facets is None:
+        facets = count_facets(params, request)
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,148 @@
+"""
+Лента рецептов от авторов, на которых подписан пользователь.
+
+Рецепт раскладывается по лентам подписчиков при публикации (push).
+Для авторов с очень большим числом подписчиков раскладка не делается,
+и их рецепты подмешиваются в ленту при чтении (pull). Такие авторы
+отмечены флагом `User.feed_pull`, который обновляется при подписке и
+отписке. Когда автор возвращается к раскладке, ленты его подписчиков
+дополняются его последними рецептами.
+"""
+from itertools import islice
+
+from django.db.models import Exists, OuterRef, Q
+
+from backend.settings import (FEED_BACKFILL_SIZE, FEED_FANOUT_BATCH_SIZE,
+                              FEED_FANOUT_MAX_SUBSCRIBERS)
+from users.models import Subscription, User
+from .models import FeedEntry, Recipe
+
+
+def has_too_many_subscribers(author_id):
+    """Слишком много подписчиков для раскладки рецептов по лентам."""
+    return Subscription.objects.filter(
+        subscribed_to_id=author_id
+    )[FEED_FANOUT_MAX_SUBSCRIBERS:FEED_FANOUT_MAX_SUBSCRIBERS + 1].exists()
+
+
+def is_pull_author(author_id):
+    """Рецепты автора подмешиваются в ленты при чтении."""
+    return User.objects.filter(pk=author_id, feed_pull=True).exists()
+
+
+def update_pull_author(author_id):
+    """
+    Обновляет флаг `feed_pull` автора по числу подписчиков. Возвращает
+    True, если автор вернулся к раскладке и ленты подписчиков нужно
+    дополнить его рецептами.
+    """
+    pull = has_too_many_subscribers(author_id)
+    changed = User.objects.filter(pk=author_id).exclude(
+        feed_pull=pull
+    ).update(feed_pull=pull)
+    return bool(changed) and not pull
+
+
+def fan_out_recipe(recipe):
+    """Добавляет рецепт в ленты подписчиков автора пачками."""
+    if is_pull_author(recipe.author_id):
+        return
+    subscriber_ids = (
+        Subscription.objects
+        .filter(subscribed_to_id=recipe.author_id)
+        .values_list('subscriber_id', flat=True)
+        .iterator(chunk_size=FEED_FANOUT_BATCH_SIZE)
+    )
+    while batch := list(islice(subscriber_ids, FEED_FANOUT_BATCH_SIZE)):
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(
+                    user_id=user_id,
+                    recipe_id=recipe.id,
+                    author_id=recipe.author_id,
+                    created_at=recipe.created_at,
+                )
+                for user_id in batch
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def backfill_feed(subscriber_id, author_id):
+    """Добавляет в ленту последние рецепты автора после подписки."""
+    if is_pull_author(author_id):
+        return
+    recipes = Recipe.objects.filter(author_id=author_id).values_list(
+        'id', 'created_at'
+    )[:FEED_BACKFILL_SIZE]
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                user_id=subscriber_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                created_at=created_at,
+            )
+            for recipe_id, created_at in recipes
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_author_feeds(author_id):
+    """Добавляет последние рецепты автора в ленты всех его подписчиков."""
+    if is_pull_author(author_id):
+        return
+    recipes = list(Recipe.objects.filter(author_id=author_id).values_list(
+        'id', 'created_at'
+    )[:FEED_BACKFILL_SIZE])
+    subscriber_ids = (
+        Subscription.objects
+        .filter(subscribed_to_id=author_id)
+        .values_list('subscriber_id', flat=True)
+        .iterator(chunk_size=FEED_FANOUT_BATCH_SIZE)
+    )
+    while batch := list(islice(subscriber_ids, FEED_FANOUT_BATCH_SIZE)):
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(
+                    user_id=user_id,
+                    recipe_id=recipe_id,
+                    author_id=author_id,
+                    created_at=created_at,
+                )
+                for user_id in batch
+                for recipe_id, created_at in recipes
+            ],
+            batch_size=FEED_FANOUT_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def trim_feed(subscriber_id, author_id):
+    """Удаляет из ленты рецепты автора после отписки."""
+    FeedEntry.objects.filter(
+        user_id=subscriber_id, author_id=author_id
+    ).delete()
+
+
+def get_feed_queryset(user):
+    """
+    Рецепты из ленты пользователя, включая авторов без раскладки.
+
+    Без таких авторов лента читается по индексу `feed_user_created_idx`
+    в порядке `FeedEntry.created_at` (даты публикации рецепта).
+    """
+    pull_author_ids = list(
+        User.objects
+        .filter(subscribers__subscriber=user, feed_pull=True)
+        .values_list('id', flat=True)
+    )
+    if not pull_author_ids:
+        return Recipe.objects.filter(feed_entries__user=user).order_by(
+            '-feed_entries__created_at', '-id'
+        )
+    return Recipe.objects.filter(
+        Q(Exists(FeedEntry.objects.filter(user=user, recipe=OuterRef('pk'))))
+        | Q(author_id__in=pull_author_ids)
+    )
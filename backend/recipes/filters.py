@@ -1,7 +1,8 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 from django_filters.rest_framework import CharFilter, FilterSet
 
-from .models import Ingredient, Recipe, Tag
+from .models import Cart, Favorite, Ingredient, Recipe, Tag
 
 
 class IngredientFilter(FilterSet):
@@ -22,9 +23,16 @@ class RecipeFilter(FilterSet):
     """
     Фильтр для рецептов.
 
-    Позволяет фильтровать рецепты по автору, избранным, корзине и тегам.
+    Позволяет фильтровать рецепты по автору, избранным, корзине и тегам
+    и сортировать их по популярности, трендам и времени приготовления.
     """
 
+    ORDERINGS = {
+        'popular': ('-popularity', '-id'),
+        'trending': ('-trending_score', '-id'),
+        'fastest': ('cooking_time', '-id'),
+    }
+
     author_first_name = filters.CharFilter(
         field_name='author__first_name',
         lookup_expr='icontains'
@@ -39,6 +47,11 @@ class RecipeFilter(FilterSet):
         field_name='tags__slug',
         queryset=Tag.objects.all(),
         to_field_name='slug',
+        method='filter_tags',
+    )
+    ordering = filters.ChoiceFilter(
+        choices=[(key, key) for key in ORDERINGS],
+        method='filter_ordering'
     )
 
     class Meta:
@@ -49,22 +62,46 @@ class RecipeFilter(FilterSet):
             'is_favorited',
             'is_in_shopping_cart',
             'tags',
+            'ordering',
         )
 
-    def filter_is_favorited(self, queryset, name, value):
-        """Фильтрует рецепты по тому, добавлен ли рецепт в избранное."""
+    def filter_by_exists(self, queryset, related, user_field, value):
+        """
+        Полусоединение (EXISTS) или антисоединение (NOT EXISTS) со
+        связанными записями текущего пользователя: строки рецептов не
+        размножаются, и план не зависит от сочетания фильтров.
+        """
         user = self.request.user
         if not user.is_authenticated:
             return queryset.all()
-        if value:
-            return queryset.filter(favorited_by__user=user)
-        return queryset.exclude(favorited_by__user=user)
+        exists = Exists(
+            related.filter(recipe=OuterRef('pk'), **{user_field: user})
+        )
+        return queryset.filter(exists if value else ~exists)
+
+    def filter_is_favorited(self, queryset, name, value):
+        """Фильтрует рецепты по тому, добавлен ли рецепт в избранное."""
+        return self.filter_by_exists(
+            queryset, Favorite.objects, 'user', value
+        )
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         """Фильтрует рецепты по тому, находятся ли они в корзине."""
-        user = self.request.user
-        if not user.is_authenticated:
-            return queryset.all()
-        if value:
-            return queryset.filter(carts__user=user)
-        return queryset.exclude(carts__user=user)
+        return self.filter_by_exists(
+            queryset, Cart.recipes.through.objects, 'cart__user', value
+        )
+
+    def filter_tags(self, queryset, name, value):
+        """Рецепты хотя бы с одним из тегов, без дублей."""
+        if not value:
+            # Без тегов поле формы возвращает пустой QuerySet, а не [].
+            return queryset
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'), tag__in=value
+            )
+        ))
+
+    def filter_ordering(self, queryset, name, value):
+        """Сортирует рецепты по выбранному критерию."""
+        return queryset.order_by(*self.ORDERINGS[value])
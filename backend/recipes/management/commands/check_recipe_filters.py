@@ -0,0 +1,127 @@
+import itertools
+import time
+from collections import defaultdict
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from rest_framework.test import APIRequestFactory
+
+from recipes.filters import RecipeFilter
+from recipes.models import Cart, Favorite, Recipe, Tag
+from users.models import User
+
+FLAGS = (None, 'true', 'false')
+
+
+class Command(BaseCommand):
+    """
+    Команда для проверки `RecipeFilter` на сочетаниях фильтров
+    `tags`, `author`, `is_favorited` и `is_in_shopping_cart`.
+
+    Результат каждого сочетания сравнивается с множеством рецептов,
+    посчитанным в Python по связям из базы, и проверяется на дубли.
+    """
+
+    help = 'Check RecipeFilter combinations against expected recipe sets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=3)
+
+    def expected(self, data, user, relations):
+        tags, authors, favorites, carts = relations
+        ids = set(authors)
+        if 'tags' in data:
+            ids &= {
+                pk for pk, slugs in tags.items()
+                if slugs & set(data.getlist('tags'))
+            }
+        if 'author' in data:
+            ids &= {
+                pk for pk, author in authors.items()
+                if author == int(data['author'])
+            }
+        for name, related in (
+            ('is_favorited', favorites), ('is_in_shopping_cart', carts)
+        ):
+            if name in data and user.is_authenticated:
+                own = related[user.pk]
+                ids = ids & own if data[name] == 'true' else ids - own
+        return ids
+
+    def combinations(self, slugs, author_id):
+        tag_sets = ([], slugs[:1], slugs[:2])
+        for tags, author, favorited, in_cart in itertools.product(
+            tag_sets, (None, author_id), FLAGS, FLAGS
+        ):
+            data = QueryDict(mutable=True)
+            data.setlist('tags', tags)
+            for name, value in (
+                ('author', author),
+                ('is_favorited', favorited),
+                ('is_in_shopping_cart', in_cart),
+            ):
+                if value is not None:
+                    data[name] = value
+            if not tags:
+                del data['tags']
+            yield data
+
+    def load_relations(self):
+        tags = defaultdict(set)
+        for recipe_id, slug in Recipe.tags.through.objects.values_list(
+            'recipe_id', 'tag__slug'
+        ):
+            tags[recipe_id].add(slug)
+        authors = dict(Recipe.objects.values_list('pk', 'author_id'))
+        favorites = defaultdict(set)
+        for user_id, recipe_id in Favorite.objects.values_list(
+            'user_id', 'recipe_id'
+        ):
+            favorites[user_id].add(recipe_id)
+        carts = defaultdict(set)
+        for user_id, recipe_id in Cart.recipes.through.objects.values_list(
+            'cart__user_id', 'recipe_id'
+        ):
+            carts[user_id].add(recipe_id)
+        return tags, authors, favorites, carts
+
+    def handle(self, *args, **options):
+        relations = self.load_relations()
+        users = [AnonymousUser(), *User.objects.filter(
+            favorites__isnull=False, cart__recipes__isnull=False
+        ).distinct()[:options['users']]]
+        # Самые частые теги: у многих рецептов их несколько.
+        slugs = list(
+            Tag.objects.order_by('-recipes__id').values_list('slug', flat=True)
+            .distinct()[:2]
+        )
+        author_id = Recipe.objects.values_list('author_id', flat=True).first()
+        if author_id is None:
+            raise CommandError('Нет рецептов: заполните базу')
+        started = time.perf_counter()
+        checked = 0
+        for user in users:
+            for data in self.combinations(slugs, author_id):
+                request = APIRequestFactory().get('/api/recipes/', data)
+                request.user = user
+                ids = list(RecipeFilter(
+                    data, queryset=Recipe.objects.all(), request=request
+                ).qs.values_list('pk', flat=True))
+                if len(ids) != len(set(ids)):
+                    raise CommandError(
+                        f'Дубли рецептов для {user}: {data.urlencode()}'
+                    )
+                expected = self.expected(data, user, relations)
+                if set(ids) != expected:
+                    raise CommandError(
+                        f'Неверный результат для {user}: {data.urlencode()}: '
+                        f'лишние {sorted(set(ids) - expected)[:5]}, '
+                        f'недостающие {sorted(expected - set(ids))[:5]}'
+                    )
+                checked += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Фильтры рецептов верны: {checked} сочетаний, '
+            f'{len(users)} пользователей, '
+            f'{time.perf_counter() - started:.1f} с'
+        ))
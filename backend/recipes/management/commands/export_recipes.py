@@ -0,0 +1,118 @@
+import json
+import sys
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from recipes.models import (Cart, Favorite, Ingredient, Recipe,
+                            RecipeIngredient, Tag)
+from users.models import Subscription, User
+
+
+class Command(BaseCommand):
+    """
+    Команда для потоковой выгрузки рецептов в формате JSONL.
+
+    Записи идут в порядке, удобном для загрузки `import_recipes`:
+    теги, ингредиенты, пользователи, рецепты, избранное, корзины,
+    подписки. Изображения выгружаются ссылками на файлы в MEDIA_ROOT.
+    """
+
+    help = 'Stream tags, ingredients, users, recipes, favorites and carts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для записи; по умолчанию stdout'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def iter_records(self, chunk_size):
+        for tag in Tag.objects.order_by('id').iterator(chunk_size):
+            yield {
+                'type': 'tag', 'id': tag.id,
+                'name': tag.name, 'slug': tag.slug,
+            }
+        ingredients = Ingredient.objects.order_by('id')
+        for ingredient in ingredients.iterator(chunk_size):
+            yield {
+                'type': 'ingredient', 'id': ingredient.id,
+                'name': ingredient.name,
+                'measurement_unit': ingredient.measurement_unit,
+            }
+        for user in User.objects.order_by('id').iterator(chunk_size):
+            yield {
+                'type': 'user', 'id': user.id,
+                'email': user.email, 'username': user.username,
+                'first_name': user.first_name, 'last_name': user.last_name,
+                'password': user.password,
+                'avatar': user.avatar.name or None,
+            }
+        recipes = Recipe.objects.order_by('created_at', 'id').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredients',
+                queryset=RecipeIngredient.objects.order_by('id')
+            ),
+        )
+        for recipe in recipes.iterator(chunk_size):
+            yield {
+                'type': 'recipe', 'id': recipe.id,
+                'author': recipe.author_id, 'name': recipe.name,
+                'text': recipe.text, 'image': recipe.image.name or None,
+                'created_at': recipe.created_at.isoformat(),
+                'cooking_time': recipe.cooking_time,
+                'popularity': recipe.popularity,
+                'trending_score': recipe.trending_score,
+                'tags': [tag.id for tag in recipe.tags.all()],
+                'ingredients': [
+                    [item.ingredient_id, item.amount]
+                    for item in recipe.ingredients.all()
+                ],
+            }
+        favorites = Favorite.objects.order_by('id').values_list(
+            'user_id', 'recipe_id'
+        )
+        for user_id, recipe_id in favorites.iterator(chunk_size):
+            yield {'type': 'favorite', 'user': user_id, 'recipe': recipe_id}
+        carts = Cart.objects.order_by('id').prefetch_related('recipes')
+        for cart in carts.iterator(chunk_size):
+            yield {
+                'type': 'cart', 'user': cart.user_id,
+                'recipes': [recipe.id for recipe in cart.recipes.all()],
+            }
+        subscriptions = Subscription.objects.order_by('id').values_list(
+            'subscriber_id', 'subscribed_to_id'
+        )
+        for subscriber_id, author_id in subscriptions.iterator(chunk_size):
+            yield {
+                'type': 'subscription',
+                'subscriber': subscriber_id, 'subscribed_to': author_id,
+            }
+
+    def handle(self, *args, **options):
+        path = options['path']
+        output = (
+            sys.stdout if path == '-'
+            else open(path, 'w', encoding='utf-8')
+        )
+        counts = Counter()
+        started = time.perf_counter()
+        try:
+            for record in self.iter_records(options['chunk_size']):
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                counts[record['type']] += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        self.stderr.write(
+            ', '.join(f'{kind}: {count}' for kind, count in counts.items())
+        )
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено {total} записей за {elapsed:.2f} с '
+            f'({total / elapsed if elapsed else 0:.0f} записей/с)'
+        ))
@@ -0,0 +1,324 @@
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from core.jobs import enqueue_on_commit
+from recipes.changes import record_many
+from recipes.feed import backfill_feed, update_pull_author
+from recipes.models import (Cart, Change, Favorite, Ingredient, Recipe,
+                            RecipeIngredient, Tag)
+from recipes.reference import forget_reference_lists
+from recipes.tasks import fan_out_new_recipe
+from users.models import Subscription, User
+
+ORDER = (
+    'tag', 'ingredient', 'user', 'recipe', 'favorite', 'cart', 'subscription'
+)
+# Сколько конфликтов каждого типа показывать в отчёте.
+CONFLICTS_SHOWN = 5
+
+
+class Command(BaseCommand):
+    """
+    Команда для загрузки рецептов из JSONL, созданного `export_recipes`.
+
+    Записи загружаются пачками, каждая пачка — в своей транзакции.
+    Идентификаторы из файла переназначаются на идентификаторы в текущей
+    базе; существующие объекты сопоставляются по естественным ключам:
+    теги по slug, ингредиенты по названию и единице измерения,
+    пользователи по email, рецепты по автору и названию. Запись, которая
+    не совпала по ключу, но заняла бы чужое уникальное значение (имя
+    пользователя, название рецепта или ингредиента), пропускается вместе
+    со ссылками на неё и попадает в отчёт о конфликтах.
+
+    `bulk_create` не отправляет сигналы, поэтому команда сама делает то,
+    что делают их обработчики: пишет журнал изменений для
+    дельта-синхронизации, ставит в очередь раскладку новых рецептов по
+    лентам и дополняет ленты по новым подпискам. Дата публикации рецепта
+    восстанавливается из файла.
+    """
+
+    help = 'Import recipes exported with export_recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для чтения; по умолчанию stdin'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.ids = {kind: {} for kind in ORDER}
+        self.counts = Counter()
+        self.conflicts = defaultdict(list)
+        path = options['path']
+        source = (
+            sys.stdin if path == '-' else open(path, encoding='utf-8')
+        )
+        started = time.perf_counter()
+        batch, kind = [], None
+        try:
+            for line in source:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get('type') not in ORDER:
+                    raise CommandError(
+                        f'Неизвестный тип записи: {record.get("type")}'
+                    )
+                if batch and (
+                    record['type'] != kind
+                    or len(batch) >= options['batch_size']
+                ):
+                    self.flush(kind, batch)
+                    batch = []
+                kind = record['type']
+                batch.append(record)
+            if batch:
+                self.flush(kind, batch)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        forget_reference_lists()
+        elapsed = time.perf_counter() - started
+        total = sum(self.counts.values())
+        self.stdout.write(', '.join(
+            f'{kind}: {count}' for kind, count in self.counts.items()
+        ))
+        for kind, conflicts in self.conflicts.items():
+            self.stderr.write(self.style.WARNING(
+                f'Пропущено {kind}: {len(conflicts)} из-за конфликтов: '
+                + '; '.join(conflicts[:CONFLICTS_SHOWN])
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {total} записей за {elapsed:.2f} с '
+            f'({total / elapsed if elapsed else 0:.0f} записей/с). '
+            f'Раскладку новых рецептов по лентам выполнит run_worker. '
+            f'Запустите rebuild_similarity_index и rebuild_pantry_index '
+            f'для новых рецептов.'
+        ))
+
+    def flush(self, kind, records):
+        with transaction.atomic():
+            getattr(self, f'import_{kind}s')(records)
+        self.counts[kind] += len(records)
+
+    def remap(self, model, records, kind, fields, key, build, unique=()):
+        """
+        Сопоставляет записи с существующими объектами по естественному
+        ключу `fields` (`key` строит его значение по записи) или создаёт их.
+
+        Несовпавшая запись с занятым значением поля из `unique`
+        пропускается и попадает в `conflicts`.
+        Возвращает идентификаторы созданных объектов.
+        """
+        keys = {key(record) for record in records}
+        existing = {}
+        for *values, pk in model.objects.filter(
+            **{f'{fields[0]}__in': {first for first, *_ in keys}}
+        ).values_list(*fields, 'id'):
+            if tuple(values) in keys:
+                existing[tuple(values)] = pk
+        taken = {
+            field: set(
+                model.objects
+                .filter(**{f'{field}__in': [
+                    record[field] for record in records
+                ]})
+                .values_list(field, flat=True)
+            )
+            for field in unique
+        }
+        created = {}
+        for record in records:
+            values = key(record)
+            if values in existing or values in created:
+                continue
+            clashes = [
+                field for field in unique if record[field] in taken[field]
+            ]
+            if clashes:
+                self.conflicts[kind].append(', '.join(
+                    f'{field} «{record[field]}» занят' for field in clashes
+                ))
+                continue
+            for field in unique:
+                taken[field].add(record[field])
+            created[values] = build(record)
+        model.objects.bulk_create(created.values())
+        for record in records:
+            values = key(record)
+            if values in created:
+                self.ids[kind][record['id']] = created[values].id
+            elif values in existing:
+                self.ids[kind][record['id']] = existing[values]
+        return {obj.id for obj in created.values()}
+
+    def import_tags(self, records):
+        self.remap(
+            Tag, records, 'tag', ('slug',),
+            lambda record: (record['slug'],),
+            lambda record: Tag(name=record['name'], slug=record['slug']),
+            unique=('name',),
+        )
+
+    def import_ingredients(self, records):
+        self.remap(
+            Ingredient, records, 'ingredient', ('name', 'measurement_unit'),
+            lambda record: (record['name'], record['measurement_unit']),
+            lambda record: Ingredient(
+                name=record['name'],
+                measurement_unit=record['measurement_unit']
+            ),
+            unique=('name',),
+        )
+
+    def import_users(self, records):
+        self.remap(
+            User, records, 'user', ('email',),
+            lambda record: (record['email'],),
+            lambda record: User(
+                email=record['email'], username=record['username'],
+                first_name=record['first_name'],
+                last_name=record['last_name'],
+                password=record['password'], avatar=record['avatar'],
+            ),
+            unique=('username',),
+        )
+
+    def import_recipes(self, records):
+        authors = self.ids['user']
+        records = [
+            record for record in records if record['author'] in authors
+        ]
+        new_ids = self.remap(
+            Recipe, records, 'recipe', ('name', 'author_id'),
+            lambda record: (record['name'], authors[record['author']]),
+            lambda record: Recipe(
+                author_id=authors[record['author']],
+                name=record['name'], text=record['text'],
+                image=record['image'], cooking_time=record['cooking_time'],
+                popularity=record.get('popularity', 0),
+                trending_score=record.get('trending_score', 0),
+            ),
+            unique=('name',),
+        )
+        records = [
+            record for record in records
+            if self.ids['recipe'].get(record['id']) in new_ids
+        ]
+        # auto_now_add проставляет дату загрузки вместо даты публикации.
+        Recipe.objects.bulk_update(
+            [
+                Recipe(
+                    pk=self.ids['recipe'][record['id']],
+                    created_at=parse_datetime(record['created_at']),
+                )
+                for record in records if record.get('created_at')
+            ],
+            ['created_at'],
+        )
+        record_many(
+            Change.RECIPE, Change.UPSERT,
+            [(recipe_id, None) for recipe_id in new_ids]
+        )
+        for recipe_id in new_ids:
+            enqueue_on_commit(fan_out_new_recipe, recipe_id=recipe_id)
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe_id=self.ids['recipe'][record['id']],
+                ingredient_id=self.ids['ingredient'][ingredient_id],
+                amount=amount,
+            )
+            for record in records
+            for ingredient_id, amount in record['ingredients']
+            if ingredient_id in self.ids['ingredient']
+        ])
+        Recipe.tags.through.objects.bulk_create(
+            [
+                Recipe.tags.through(
+                    recipe_id=self.ids['recipe'][record['id']],
+                    tag_id=self.ids['tag'][tag_id],
+                )
+                for record in records
+                for tag_id in record['tags']
+                if tag_id in self.ids['tag']
+            ],
+            ignore_conflicts=True,
+        )
+
+    def import_favorites(self, records):
+        pairs = [
+            (self.ids['recipe'][record['recipe']],
+             self.ids['user'][record['user']])
+            for record in records
+            if record['user'] in self.ids['user']
+            and record['recipe'] in self.ids['recipe']
+        ]
+        Favorite.objects.bulk_create(
+            [
+                Favorite(user_id=user_id, recipe_id=recipe_id)
+                for recipe_id, user_id in pairs
+            ],
+            ignore_conflicts=True,
+        )
+        record_many(Change.FAVORITE, Change.UPSERT, pairs)
+
+    def import_carts(self, records):
+        records = [
+            record for record in records if record['user'] in self.ids['user']
+        ]
+        user_ids = [self.ids['user'][record['user']] for record in records]
+        carts = dict(
+            Cart.objects.filter(user_id__in=user_ids)
+            .values_list('user_id', 'id')
+        )
+        created = [
+            Cart(user_id=user_id) for user_id in user_ids
+            if user_id not in carts
+        ]
+        Cart.objects.bulk_create(created)
+        carts.update((cart.user_id, cart.id) for cart in created)
+        pairs = [
+            (self.ids['recipe'][recipe_id], self.ids['user'][record['user']])
+            for record in records
+            for recipe_id in record['recipes']
+            if recipe_id in self.ids['recipe']
+        ]
+        Cart.recipes.through.objects.bulk_create(
+            [
+                Cart.recipes.through(
+                    cart_id=carts[user_id], recipe_id=recipe_id
+                )
+                for recipe_id, user_id in pairs
+            ],
+            ignore_conflicts=True,
+        )
+        record_many(Change.CART, Change.UPSERT, pairs)
+
+    def import_subscriptions(self, records):
+        users = self.ids['user']
+        pairs = [
+            (users[record['subscriber']], users[record['subscribed_to']])
+            for record in records
+            if record['subscriber'] in users
+            and record['subscribed_to'] in users
+        ]
+        Subscription.objects.bulk_create(
+            [
+                Subscription(
+                    subscriber_id=subscriber_id, subscribed_to_id=author_id
+                )
+                for subscriber_id, author_id in pairs
+            ],
+            ignore_conflicts=True,
+        )
+        for author_id in {author_id for _, author_id in pairs}:
+            update_pull_author(author_id)
+        for subscriber_id, author_id in pairs:
+            backfill_feed(subscriber_id, author_id)
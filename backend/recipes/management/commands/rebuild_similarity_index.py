@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+from itertools import groupby, islice
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from recipes.models import LshBucket, RecipeIngredient, RecipeSignature
+from recipes.similarity import compute_index_rows, save_index_rows
+
+
+class Command(BaseCommand):
+    """
+    Команда для перестроения индекса похожих рецептов.
+
+    Пачки рецептов читаются из базы потоком и считаются в пуле
+    процессов; в работе одновременно не больше двух пачек на процесс,
+    поэтому память не зависит от числа рецептов.
+    """
+
+    help = 'Rebuild MinHash signatures and LSH buckets for all recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def iter_batches(self, batch_size, slots):
+        """
+        Пачки пар (id рецепта, id ингредиентов) в порядке id рецепта.
+
+        Пул забирает пачки в отдельном потоке; следующая пачка читается,
+        только когда освободится место в `slots`.
+        """
+        pairs = (
+            RecipeIngredient.objects
+            .order_by('recipe_id')
+            .values_list('recipe_id', 'ingredient_id')
+            .iterator(chunk_size=batch_size * 10)
+        )
+        recipes = (
+            (recipe_id, [ingredient_id for _, ingredient_id in group])
+            for recipe_id, group in groupby(pairs, key=lambda pair: pair[0])
+        )
+        try:
+            while True:
+                slots.acquire()
+                batch = list(islice(recipes, batch_size))
+                if not batch:
+                    break
+                yield batch
+        finally:
+            # Соединение открыто в потоке пула, закрываем его там же.
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        workers = options['workers']
+        in_flight = workers * 2
+        slots = threading.Semaphore(in_flight)
+        total = 0
+        # Процессы пула создаются до открытия соединений с базой.
+        connections.close_all()
+        with Pool(workers) as pool:
+            try:
+                with transaction.atomic():
+                    RecipeSignature.objects.all().delete()
+                    LshBucket.objects.all().delete()
+                    for rows in pool.imap_unordered(
+                        compute_index_rows,
+                        self.iter_batches(options['batch_size'], slots),
+                    ):
+                        slots.release()
+                        save_index_rows(rows)
+                        total += len(rows)
+            except BaseException:
+                # Иначе поток пула ждёт места навсегда и пул не закроется.
+                for _ in range(in_flight):
+                    slots.release()
+                raise
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс похожих рецептов перестроен: {total} рецептов '
+            f'за {time.perf_counter() - started:.2f} с'
+        ))
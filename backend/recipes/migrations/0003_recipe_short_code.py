@@ -0,0 +1,50 @@
+import secrets
+import string
+
+from django.db import migrations, models
+
+import recipes.models
+
+# Генератор кодов на момент миграции: код модели может измениться позже.
+BASE62_ALPHABET = string.digits + string.ascii_letters
+SHORT_CODE_LENGTH = 8
+
+
+def generate_short_code():
+    return ''.join(
+        secrets.choice(BASE62_ALPHABET) for _ in range(SHORT_CODE_LENGTH)
+    )
+
+
+def fill_short_codes(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    used = set()
+    objects = list(Recipe.objects.only('id'))
+    for recipe in objects:
+        code = generate_short_code()
+        while code in used:
+            code = generate_short_code()
+        used.add(code)
+        recipe.short_code = code
+    Recipe.objects.bulk_update(objects, ['short_code'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='short_code',
+            field=models.CharField(editable=False, max_length=8, null=True, verbose_name='Код короткой ссылки'),
+        ),
+        migrations.RunPython(fill_short_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_code',
+            field=models.CharField(default=recipes.models.generate_short_code, editable=False, max_length=8, unique=True, verbose_name='Код короткой ссылки'),
+        ),
+    ]
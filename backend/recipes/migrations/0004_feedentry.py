@@ -0,0 +1,81 @@
+# Generated by Django 4.2.20 on 2026-10-19 08:51
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+# Значения FEED_FANOUT_MAX_SUBSCRIBERS и FEED_BACKFILL_SIZE на момент
+# миграции.
+FANOUT_MAX_SUBSCRIBERS = 10000
+BACKFILL_SIZE = 50
+
+
+def fill_feeds(apps, schema_editor):
+    """
+    Заполняет ленты по уже существующим подпискам. Авторов с большим
+    числом подписчиков пропускает, как и раскладка при публикации:
+    их рецепты подмешиваются в ленту при чтении.
+    """
+    Subscription = apps.get_model('users', 'Subscription')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    FeedEntry = apps.get_model('recipes', 'FeedEntry')
+    pull_author_ids = set(
+        Subscription.objects
+        .values('subscribed_to_id')
+        .annotate(followers=Count('id'))
+        .filter(followers__gt=FANOUT_MAX_SUBSCRIBERS)
+        .values_list('subscribed_to_id', flat=True)
+    )
+    subscriptions = Subscription.objects.exclude(
+        subscribed_to_id__in=pull_author_ids
+    ).values_list('subscriber_id', 'subscribed_to_id')
+    for subscriber_id, author_id in subscriptions.iterator():
+        recipes = Recipe.objects.filter(author_id=author_id).order_by(
+            '-created_at'
+        ).values_list('id', 'created_at')[:BACKFILL_SIZE]
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(
+                    user_id=subscriber_id,
+                    recipe_id=recipe_id,
+                    author_id=author_id,
+                    created_at=created_at,
+                )
+                for recipe_id, created_at in recipes
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0003_recipe_short_code'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['user', '-created_at'], name='feed_user_created_idx'), models.Index(fields=['user', 'author'], name='feed_user_author_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
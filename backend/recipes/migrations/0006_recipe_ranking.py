@@ -0,0 +1,91 @@
+# Generated by Django 4.2.20 on 2026-10-19 08:53
+
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Значения на момент миграции: код и настройки могут измениться позже.
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+TRENDING_TAU_HOURS = 72 / math.log(2)
+
+
+def trending_exponent(moment):
+    hours = (moment - TRENDING_EPOCH).total_seconds() / 3600
+    return hours / TRENDING_TAU_HOURS
+
+
+def fill_ranking(apps, schema_editor):
+    """
+    Считает популярность и тренды по уже существующим данным.
+
+    Как и `register_engagement`, учитывает и избранное, и корзины. Время
+    добавления рецепта в корзину не хранится, поэтому для корзин берётся
+    дата создания корзины: она не позже добавления, и вклад таких
+    рецептов в тренды может быть занижен, но не завышен.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    Cart = apps.get_model('recipes', 'Cart')
+    exponents = defaultdict(list)
+    engagements = (
+        Favorite.objects.values_list('recipe_id', 'created_at'),
+        Cart.recipes.through.objects.values_list(
+            'recipe_id', 'cart__created_at'
+        ),
+    )
+    for queryset in engagements:
+        for recipe_id, created_at in queryset.iterator():
+            exponents[recipe_id].append(trending_exponent(created_at))
+    recipes = list(
+        Recipe.objects.annotate(
+            favorites=Count('favorited_by', distinct=True),
+            carts_count=Count('carts', distinct=True),
+        )
+    )
+    for recipe in recipes:
+        recipe.popularity = recipe.favorites + recipe.carts_count
+        values = exponents.get(recipe.id)
+        if values:
+            top = max(values)
+            recipe.trending_score = top + math.log(
+                sum(math.exp(value - top) for value in values)
+            )
+    Recipe.objects.bulk_update(
+        recipes, ['popularity', 'trending_score'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_similarity_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Рейтинг в трендах'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-popularity', '-id'], name='recipe_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['cooking_time', '-id'], name='recipe_fastest_idx'),
+        ),
+        migrations.RunPython(fill_ranking, migrations.RunPython.noop),
+    ]
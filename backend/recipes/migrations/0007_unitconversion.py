@@ -0,0 +1,51 @@
+# Generated by Django 4.2.20 on 2026-10-19 08:53
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+CONVERSIONS = (
+    ('кг', 'г', Decimal('1000')),
+    ('мг', 'г', Decimal('0.001')),
+    ('л', 'мл', Decimal('1000')),
+    ('стакан', 'мл', Decimal('200')),
+    ('ст. л.', 'мл', Decimal('15')),
+    ('ч. л.', 'мл', Decimal('5')),
+    ('капля', 'мл', Decimal('0.05')),
+)
+
+
+def fill_conversions(apps, schema_editor):
+    UnitConversion = apps.get_model('recipes', 'UnitConversion')
+    UnitConversion.objects.bulk_create(
+        [
+            UnitConversion(unit=unit, base_unit=base_unit, factor=factor)
+            for unit, base_unit, factor in CONVERSIONS
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnitConversion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit', models.CharField(max_length=50, unique=True, verbose_name='Единица измерения')),
+                ('base_unit', models.CharField(max_length=50, verbose_name='Базовая единица')),
+                ('factor', models.DecimalField(decimal_places=4, max_digits=12, verbose_name='Множитель')),
+            ],
+            options={
+                'verbose_name': 'Перевод единиц',
+                'verbose_name_plural': 'Переводы единиц',
+                'ordering': ('unit',),
+            },
+        ),
+        migrations.RunPython(fill_conversions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.20 on 2026-10-19 09:01
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import (AddIndexConcurrently,
+                                               TrigramExtension)
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0007_unitconversion'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AlterModelOptions(
+            name='recipeingredient',
+            options={'ordering': ('id',), 'verbose_name': 'Связь рецепт - ингредиент', 'verbose_name_plural': 'Связи рецепт - ингредиенты'},
+        ),
+        AddIndexConcurrently(
+            model_name='favorite',
+            index=models.Index(fields=['user', 'recipe'], name='favorite_user_recipe_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ingredient',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='ingredient_name_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['-created_at'], name='recipe_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-created_at'], name='recipe_author_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipeingredient',
+            index=models.Index(fields=['recipe'], include=('ingredient', 'amount'), name='recipe_ingredient_cover_idx'),
+        ),
+    ]
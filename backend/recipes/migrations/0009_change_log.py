@@ -0,0 +1,32 @@
+# Generated by Django 4.2.20 on 2026-10-19 09:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('recipe', 'Рецепт'), ('favorite', 'Избранное'), ('cart', 'Корзина')], max_length=16, verbose_name='Объект')),
+                ('action', models.CharField(choices=[('upsert', 'Создание или изменение'), ('delete', 'Удаление')], max_length=16, verbose_name='Действие')),
+                ('recipe_id', models.BigIntegerField(verbose_name='ID рецепта')),
+                ('txid', models.BigIntegerField(verbose_name='Транзакция')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Изменение',
+                'verbose_name_plural': 'Журнал изменений',
+                'indexes': [models.Index(fields=['txid', 'id'], name='change_cursor_idx'), models.Index(fields=['recipe_id', 'kind', 'user'], name='change_key_idx')],
+            },
+        ),
+    ]
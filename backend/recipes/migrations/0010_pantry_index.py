@@ -0,0 +1,34 @@
+# Generated by Django 4.2.20 on 2026-10-19 09:32
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeIngredientSet',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ingredient_set', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('ingredient_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), size=None, verbose_name='Ингредиенты')),
+            ],
+            options={
+                'verbose_name': 'Набор ингредиентов рецепта',
+                'verbose_name_plural': 'Наборы ингредиентов рецептов',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['ingredient_ids'], name='recipe_ingredient_set_idx')],
+            },
+        ),
+        migrations.RunSQL(
+            'INSERT INTO recipes_recipeingredientset (recipe_id, ingredient_ids) '
+            'SELECT recipe_id, array_agg(DISTINCT ingredient_id ORDER BY ingredient_id) '
+            'FROM recipes_recipeingredient GROUP BY recipe_id',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -1,18 +1,37 @@
-import os
+import secrets
+import string
 import uuid
 
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Upper
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
+from django_cleanup import cleanup
 
 from core.models import TimeStampModel
 from backend.settings import (MAX_LENGTH_NAME, MAX_LENGTH_SHORT_DESCRIPTION,
                               MAX_LENGTH_SLUG, MIN_COOKING_TIME,
-                              MIN_IMAGE_SIZE_MB, MIN_INGREDIENT_AMOUNT)
+                              MIN_IMAGE_SIZE_MB, MIN_INGREDIENT_AMOUNT,
+                              SHORT_CODE_LENGTH)
 
+BASE62_ALPHABET = string.digits + string.ascii_letters
 
+
+def generate_short_code():
+    """Случайный base62-код для короткой ссылки на рецепт."""
+    return ''.join(
+        secrets.choice(BASE62_ALPHABET) for _ in range(SHORT_CODE_LENGTH)
+    )
+
+
+# Файлы изображений удаляет фоновая задача (см. `recipes.tasks`),
+# а не django_cleanup в обработчике запроса.
+@cleanup.ignore
 class Recipe(TimeStampModel):
     """Модель рецепта."""
 
@@ -57,6 +76,23 @@ class Recipe(TimeStampModel):
         editable=False,
         unique=True
     )
+    short_code = models.CharField(
+        max_length=SHORT_CODE_LENGTH,
+        default=generate_short_code,
+        editable=False,
+        unique=True,
+        verbose_name='Код короткой ссылки'
+    )
+    popularity = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Популярность'
+    )
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Рейтинг в трендах'
+    )
 
     class Meta:
         ordering = ['-created_at']
@@ -68,14 +104,35 @@ class Recipe(TimeStampModel):
                 name='unique_name_author'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['-popularity', '-id'],
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=['-trending_score', '-id'],
+                name='recipe_trending_idx'
+            ),
+            models.Index(
+                fields=['cooking_time', '-id'],
+                name='recipe_fastest_idx'
+            ),
+            models.Index(
+                fields=['-created_at'],
+                name='recipe_created_idx'
+            ),
+            models.Index(
+                fields=['author', '-created_at'],
+                name='recipe_author_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.name} (Автор: {self.author})'
 
     def generate_short_url(self):
         """Генерация короткого URL на основе домена."""
-        domain = settings.SITE_DOMAIN
-        return f'{domain}/{self.short_url}'
+        return build_short_link(self.short_code)
 
     def clean(self):
         """Проверка изображения и наличия ингредиентов перед сохранением."""
@@ -101,12 +158,19 @@ class Recipe(TimeStampModel):
                 else 'Описание отсутствует')
 
 
+def build_short_link(short_code):
+    """Полная короткая ссылка для кода рецепта."""
+    return f'{settings.SITE_DOMAIN}/s/{short_code}'
+
+
+def short_link_cache_key(short_code):
+    return f'short-link:{short_code}'
+
+
 @receiver(post_delete, sender=Recipe)
-def delete_recipe_image(sender, instance, **kwargs):
-    """Удаляет файл изображения при удалении рецепта."""
-    if instance.image:
-        if os.path.isfile(instance.image.path):
-            os.remove(instance.image.path)
+def forget_short_link(sender, instance, **kwargs):
+    """Удаляет код короткой ссылки удалённого рецепта из кэша."""
+    cache.delete(short_link_cache_key(instance.short_code))
 
 
 class Tag(TimeStampModel):
@@ -162,11 +226,45 @@ class Ingredient(TimeStampModel):
                 fields=['name', 'measurement_unit'],
                 name='unique_ingredient')
         ]
+        indexes = [
+            # Поиск по подстроке: icontains сравнивает UPPER(name).
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                name='ingredient_name_trgm_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.name} ({self.measurement_unit})'
 
 
+class UnitConversion(models.Model):
+    """Перевод единицы измерения в базовую для списка покупок."""
+
+    unit = models.CharField(
+        max_length=MAX_LENGTH_SLUG,
+        unique=True,
+        verbose_name='Единица измерения'
+    )
+    base_unit = models.CharField(
+        max_length=MAX_LENGTH_SLUG,
+        verbose_name='Базовая единица'
+    )
+    factor = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        verbose_name='Множитель'
+    )
+
+    class Meta:
+        verbose_name = 'Перевод единиц'
+        verbose_name_plural = 'Переводы единиц'
+        ordering = ('unit',)
+
+    def __str__(self):
+        return f'1 {self.unit} = {self.factor.normalize():f} {self.base_unit}'
+
+
 class RecipeIngredient(models.Model):
     """Связь рецепта с ингредиентом и его количеством."""
 
@@ -189,7 +287,14 @@ class RecipeIngredient(models.Model):
     class Meta:
         verbose_name = 'Связь рецепт - ингредиент'
         verbose_name_plural = 'Связи рецепт - ингредиенты'
-        ordering = ('recipe__name',)
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['recipe'],
+                include=['ingredient', 'amount'],
+                name='recipe_ingredient_cover_idx'
+            ),
+        ]
 
     def clean(self):
         if self.amount < MIN_INGREDIENT_AMOUNT:
@@ -262,6 +367,207 @@ class Favorite(TimeStampModel):
             models.UniqueConstraint(
                 fields=['recipe', 'user'],
                 name='unique_favorite')]
+        indexes = [
+            models.Index(
+                fields=['user', 'recipe'],
+                name='favorite_user_recipe_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'Рецепт "{self.recipe}" в избранном у пользователя {self.user}'
+
+
+class FeedEntry(models.Model):
+    """
+    Запись ленты подписок пользователя.
+
+    Заполняется при публикации рецепта для всех подписчиков автора.
+    """
+
+    user = models.ForeignKey(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    created_at = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        ordering = ('-created_at',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry')
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at'],
+                name='feed_user_created_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_user_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте пользователя {self.user}'
+
+
+class RecipeSignature(models.Model):
+    """MinHash-сигнатура набора ингредиентов рецепта."""
+
+    recipe = models.OneToOneField(
+        'Recipe',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Рецепт'
+    )
+    minhash = models.BinaryField(verbose_name='MinHash-сигнатура')
+
+    class Meta:
+        verbose_name = 'Сигнатура рецепта'
+        verbose_name_plural = 'Сигнатуры рецептов'
+
+    def __str__(self):
+        return f'Сигнатура рецепта {self.recipe_id}'
+
+
+class LshBucket(models.Model):
+    """Корзина LSH-индекса: рецепты с совпадающей полосой сигнатуры."""
+
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='lsh_buckets',
+        verbose_name='Рецепт'
+    )
+    bucket = models.BigIntegerField(verbose_name='Хэш полосы')
+
+    class Meta:
+        verbose_name = 'Корзина LSH'
+        verbose_name_plural = 'Корзины LSH'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'bucket'],
+                name='unique_recipe_bucket')
+        ]
+        indexes = [
+            models.Index(fields=['bucket'], name='lsh_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.bucket} ({self.recipe_id})'
+
+
+class RecipeIngredientSet(models.Model):
+    """
+    Отсортированные идентификаторы ингредиентов рецепта.
+
+    GIN-индекс по массиву — инвертированный индекс «ингредиент ->
+    рецепты» для поиска по имеющимся продуктам.
+    """
+
+    recipe = models.OneToOneField(
+        'Recipe',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ingredient_set',
+        verbose_name='Рецепт'
+    )
+    ingredient_ids = ArrayField(
+        models.BigIntegerField(),
+        verbose_name='Ингредиенты'
+    )
+
+    class Meta:
+        verbose_name = 'Набор ингредиентов рецепта'
+        verbose_name_plural = 'Наборы ингредиентов рецептов'
+        indexes = [
+            GinIndex(
+                fields=['ingredient_ids'],
+                name='recipe_ingredient_set_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Ингредиенты рецепта {self.recipe_id}'
+
+
+class Change(models.Model):
+    """
+    Запись журнала изменений для синхронизации клиентов.
+
+    Для каждого рецепта и пары (пользователь, рецепт) хранится только
+    последнее изменение. `txid` — номер транзакции, записавшей
+    изменение; по нему и `id` строится курсор синхронизации.
+    """
+
+    RECIPE = 'recipe'
+    FAVORITE = 'favorite'
+    CART = 'cart'
+    KINDS = (
+        (RECIPE, 'Рецепт'),
+        (FAVORITE, 'Избранное'),
+        (CART, 'Корзина'),
+    )
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTIONS = (
+        (UPSERT, 'Создание или изменение'),
+        (DELETE, 'Удаление'),
+    )
+
+    kind = models.CharField(
+        max_length=16,
+        choices=KINDS,
+        verbose_name='Объект'
+    )
+    action = models.CharField(
+        max_length=16,
+        choices=ACTIONS,
+        verbose_name='Действие'
+    )
+    recipe_id = models.BigIntegerField(verbose_name='ID рецепта')
+    user = models.ForeignKey(
+        'users.User',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пользователь'
+    )
+    txid = models.BigIntegerField(verbose_name='Транзакция')
+
+    class Meta:
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Журнал изменений'
+        indexes = [
+            models.Index(
+                fields=['txid', 'id'],
+                name='change_cursor_idx'
+            ),
+            models.Index(
+                fields=['recipe_id', 'kind', 'user'],
+                name='change_key_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.recipe_id}: {self.action}'
@@ -0,0 +1,84 @@
+"""
+Поиск рецептов по имеющимся ингредиентам.
+
+Для каждого рецепта хранится отсортированный массив идентификаторов
+его ингредиентов (`RecipeIngredientSet`). GIN-индекс по массиву —
+инвертированный индекс «ингредиент -> рецепты»: оператор `&&`
+объединяет списки рецептов нужных ингредиентов, не просматривая
+`RecipeIngredient`. Найденные рецепты ранжируются по доле своих
+ингредиентов, которые есть у пользователя.
+"""
+from django.db import connection
+from django.db.models import F, FloatField, Func, IntegerField
+from django.db.models.functions import Cast
+
+from .models import Recipe, RecipeIngredientSet
+
+
+class MatchedCount(Func):
+    """Сколько элементов массива входит в набор `values`."""
+
+    output_field = IntegerField()
+
+    def __init__(self, array, values, **extra):
+        super().__init__(array, **extra)
+        self.values = list(values)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        array, params = compiler.compile(self.source_expressions[0])
+        return (
+            f'(SELECT count(*) FROM unnest({array}) AS item '
+            f'WHERE item = ANY(%s))',
+            (*params, self.values),
+        )
+
+
+class Cardinality(Func):
+    function = 'cardinality'
+    output_field = IntegerField()
+
+
+def update_ingredient_set(recipe_id, ingredient_ids):
+    """Обновляет набор ингредиентов рецепта в индексе."""
+    RecipeIngredientSet.objects.update_or_create(
+        recipe_id=recipe_id,
+        defaults={'ingredient_ids': sorted(set(ingredient_ids))},
+    )
+
+
+def rebuild_ingredient_sets():
+    """Пересобирает индекс по `RecipeIngredient` одним запросом."""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM recipes_recipeingredientset')
+        cursor.execute(
+            'INSERT INTO recipes_recipeingredientset '
+            '(recipe_id, ingredient_ids) '
+            'SELECT recipe_id, '
+            'array_agg(DISTINCT ingredient_id ORDER BY ingredient_id) '
+            'FROM recipes_recipeingredient GROUP BY recipe_id'
+        )
+        return cursor.rowcount
+
+
+def recipes_by_ingredients(ingredient_ids):
+    """
+    Рецепты хотя бы с одним из ингредиентов, отсортированные по доле
+    имеющихся ингредиентов, затем по их числу.
+
+    Аннотации: `matched_ingredients`, `total_ingredients`, `coverage`.
+    """
+    ingredient_ids = sorted(set(ingredient_ids))
+    array = F('ingredient_set__ingredient_ids')
+    return (
+        Recipe.objects
+        .filter(ingredient_set__ingredient_ids__overlap=ingredient_ids)
+        .annotate(
+            matched_ingredients=MatchedCount(array, ingredient_ids),
+            total_ingredients=Cardinality(array),
+        )
+        .annotate(coverage=(
+            Cast('matched_ingredients', FloatField())
+            / F('total_ingredients')
+        ))
+        .order_by('-coverage', '-matched_ingredients', '-id')
+    )
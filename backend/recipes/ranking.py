@@ -0,0 +1,56 @@
+"""
+Счётчики популярности рецептов.
+
+`popularity` — число добавлений в избранное и в корзины.
+`trending_score` — натуральный логарифм суммы exp((t - TRENDING_EPOCH) / tau)
+по всем добавлениям, т.е. число добавлений с экспоненциальным затуханием
+и периодом полураспада TRENDING_HALF_LIFE_HOURS. Логарифмическая форма
+позволяет не пересчитывать старые события: новое событие прибавляется
+через logaddexp прямо в UPDATE. Удаление из избранного или корзины
+уменьшает только `popularity`: тренд со временем затухает сам.
+"""
+import math
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs, Exp, Greatest, Least, Ln
+from django.utils import timezone
+
+from backend.settings import TRENDING_EPOCH, TRENDING_HALF_LIFE_HOURS
+from .models import Recipe
+
+TRENDING_TAU_HOURS = TRENDING_HALF_LIFE_HOURS / math.log(2)
+# exp(-50) пренебрежимо мало, а PostgreSQL бросает ошибку при underflow.
+MAX_EXPONENT_GAP = 50.0
+
+
+def trending_exponent(moment):
+    """Показатель exp() для события в момент `moment`."""
+    hours = (moment - TRENDING_EPOCH).total_seconds() / 3600
+    return hours / TRENDING_TAU_HOURS
+
+
+def logaddexp(first, second):
+    """SQL-выражение ln(exp(first) + exp(second)) без переполнения."""
+    gap = Least(
+        Abs(first - second), Value(MAX_EXPONENT_GAP),
+        output_field=FloatField()
+    )
+    return Greatest(first, second) + Ln(1 + Exp(-gap))
+
+
+def register_engagement(recipe):
+    """Рецепт добавлен в избранное или корзину."""
+    Recipe.objects.filter(pk=recipe.pk).update(
+        popularity=F('popularity') + 1,
+        trending_score=logaddexp(
+            F('trending_score'),
+            Value(trending_exponent(timezone.now()), FloatField())
+        ),
+    )
+
+
+def withdraw_engagement(recipe):
+    """Рецепт удалён из избранного или корзины."""
+    Recipe.objects.filter(pk=recipe.pk, popularity__gt=0).update(
+        popularity=F('popularity') - 1
+    )
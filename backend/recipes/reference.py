@@ -0,0 +1,54 @@
+"""
+Полные списки тегов и ингредиентов в кэше.
+
+Фронтенд запрашивает их при каждой загрузке, а меняются они редко
+(админка и команды загрузки), поэтому списки хранятся в кэше готовыми
+и прогреваются при старте сервера (см. `core.warmup`). Ключи включают
+версию из базы (`core.versions`): изменение тегов или ингредиентов
+увеличивает её, и все воркеры сразу перестают читать старые списки.
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.settings import REFERENCE_CACHE_TIMEOUT
+from core.versions import bump_cache_version, cache_version
+from .models import Ingredient, Tag
+
+REFERENCE_VERSION = 'reference'
+TAGS_CACHE_KEY = 'reference:tags:{version}'
+INGREDIENTS_CACHE_KEY = 'reference:ingredients:{version}'
+
+
+def cached_tags():
+    """Список тегов в формате `TagSerializer`."""
+    return cache.get_or_set(
+        TAGS_CACHE_KEY.format(version=cache_version(REFERENCE_VERSION)),
+        lambda: list(Tag.objects.values('id', 'name', 'slug')),
+        REFERENCE_CACHE_TIMEOUT,
+    )
+
+
+def cached_ingredients():
+    """Список ингредиентов в формате `IngredientSerializer`."""
+    return cache.get_or_set(
+        INGREDIENTS_CACHE_KEY.format(
+            version=cache_version(REFERENCE_VERSION)
+        ),
+        lambda: list(
+            Ingredient.objects.values('id', 'name', 'measurement_unit')
+        ),
+        REFERENCE_CACHE_TIMEOUT,
+    )
+
+
+def forget_reference_lists():
+    bump_cache_version(REFERENCE_VERSION)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def forget_on_change(sender, **kwargs):
+    forget_reference_lists()
@@ -5,7 +5,11 @@ from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
 from backend.settings import MIN_COOKING_TIME, MIN_INGREDIENT_AMOUNT
+from core.serializers import SparseFieldsetMixin
 from .models import Cart, Favorite, Ingredient, Recipe, RecipeIngredient, Tag
+from .pantry import update_ingredient_set
+from .similarity import update_recipe_signature
+from .utils import RECIPE_FIELDS
 from users.serializers import UserListSerializer
 
 
@@ -134,6 +138,9 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             for ingredient_data in ingredients_data
         ]
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
+        ingredient_ids = [item.ingredient_id for item in recipe_ingredients]
+        update_recipe_signature(recipe.id, ingredient_ids)
+        update_ingredient_set(recipe.id, ingredient_ids)
 
     def to_representation(self, instance):
         return RecipeReadSerializer(instance, context=self.context).data
@@ -185,8 +192,12 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
-    """Сериализатор для чтения рецепта."""
+class RecipeReadSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Сериализатор для чтения рецепта.
+
+    Флаги берутся из аннотаций `recipe_read_queryset`, если они есть.
+    """
 
     author = UserListSerializer(many=False, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
@@ -197,6 +208,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 
     def get_is_favorited(self, obj):
         """Проверка на добавление рецепта в избранное."""
+        if hasattr(obj, 'viewer_favorited'):
+            return obj.viewer_favorited
         request = self.context.get('request')
         if not request.user.is_authenticated:
             return False
@@ -204,6 +217,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 
     def get_is_in_shopping_cart(self, obj):
         """Проверка на добавление рецепта в корзину."""
+        if hasattr(obj, 'viewer_in_cart'):
+            return obj.viewer_in_cart
         request = self.context.get('request')
         if not request.user.is_authenticated:
             return False
@@ -211,13 +226,31 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             return request.user.cart.recipes.filter(pk=obj.pk).exists()
         return False
 
+    def get_fields(self):
+        """Вынесенные в `included` связи заменяются идентификаторами."""
+        fields = super().get_fields()
+        sideload = self.context.get('sideload', ())
+        result = {}
+        for name, field in fields.items():
+            if name == 'author' and 'users' in sideload:
+                name = 'author_id'
+                field = serializers.IntegerField(read_only=True)
+            elif name == 'tags' and 'tags' in sideload:
+                name = 'tag_ids'
+                field = serializers.PrimaryKeyRelatedField(
+                    source='tags', many=True, read_only=True
+                )
+            result[name] = field
+        return result
+
+    def to_representation(self, instance):
+        if hasattr(instance, 'viewer_subscribed'):
+            instance.author.viewer_subscribed = instance.viewer_subscribed
+        return super().to_representation(instance)
+
     class Meta:
         model = Recipe
-        fields = (
-            'id', 'tags', 'author', 'ingredients',
-            'is_favorited', 'is_in_shopping_cart',
-            'name', 'image', 'text', 'cooking_time',
-        )
+        fields = RECIPE_FIELDS
 
 
 class RecipeBriefSerializer(serializers.ModelSerializer):
@@ -229,6 +262,19 @@ class RecipeBriefSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'name', 'image', 'cooking_time')
 
 
+class RecipeCoverageSerializer(RecipeBriefSerializer):
+    """Рецепт с долей ингредиентов, которые есть у пользователя."""
+
+    matched_ingredients = serializers.IntegerField(read_only=True)
+    total_ingredients = serializers.IntegerField(read_only=True)
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeBriefSerializer.Meta):
+        fields = RecipeBriefSerializer.Meta.fields + (
+            'matched_ingredients', 'total_ingredients', 'coverage'
+        )
+
+
 class CartSerializer(serializers.ModelSerializer):
     """Сериализатор для управления корзиной пользователя."""
 
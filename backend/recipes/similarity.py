@@ -0,0 +1,151 @@
+"""
+Поиск похожих рецептов по набору ингредиентов.
+
+Для каждого рецепта хранится MinHash-сигнатура, а её полосы (bands)
+раскладываются по корзинам LSH. Кандидаты — рецепты, попавшие хотя бы
+в одну общую корзину. Число общих корзин растёт со сходством, поэтому
+в переранжирование по точному коэффициенту Жаккара попадают только
+SIMILAR_CANDIDATES_LIMIT кандидатов с наибольшим числом общих корзин.
+
+numpy нужен только для расчёта сигнатур и загружается при первом
+расчёте, а не при старте воркера.
+"""
+import functools
+import hashlib
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from backend.settings import (LSH_BANDS, MINHASH_PERMUTATIONS,
+                              SIMILAR_CANDIDATES_LIMIT)
+from .models import LshBucket, Recipe, RecipeIngredient, RecipeSignature
+
+PRIME = (1 << 31) - 1
+SEED = 20250327
+
+
+@functools.lru_cache
+def coefficients():
+    """Коэффициенты хэш-функций (a, b) для MinHash."""
+    import numpy as np
+
+    rng = np.random.default_rng(SEED)
+    return (
+        rng.integers(1, PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64),
+        rng.integers(0, PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64),
+    )
+
+
+def minhash_signatures(groups):
+    """
+    MinHash-сигнатуры для списка наборов идентификаторов ингредиентов.
+
+    Все наборы хэшируются одной матричной операцией, минимум по каждому
+    набору берётся через `np.minimum.reduceat`.
+    """
+    import numpy as np
+
+    coef_a, coef_b = coefficients()
+    sizes = np.fromiter((len(ids) for ids in groups), dtype=np.int64)
+    ids = np.fromiter(
+        (item for ids in groups for item in ids), dtype=np.uint64
+    ) % PRIME
+    hashes = (coef_a[:, None] * ids[None, :] + coef_b[:, None]) % PRIME
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    return np.minimum.reduceat(hashes, offsets, axis=1).T.astype(np.uint32)
+
+
+def band_buckets(signature):
+    """Хэши полос сигнатуры; номер полосы входит в хэш."""
+    rows = len(signature) // LSH_BANDS
+    return [
+        int.from_bytes(
+            hashlib.blake2b(
+                bytes([band]) + signature[band * rows:(band + 1) * rows]
+                .tobytes(),
+                digest_size=8
+            ).digest(),
+            'big',
+            signed=True
+        )
+        for band in range(LSH_BANDS)
+    ]
+
+
+def compute_index_rows(items):
+    """
+    Сигнатуры и корзины для пар (id рецепта, id ингредиентов).
+
+    Не обращается к базе данных, поэтому может выполняться
+    в отдельном процессе.
+    """
+    items = [(recipe_id, ids) for recipe_id, ids in items if ids]
+    if not items:
+        return []
+    signatures = minhash_signatures([ids for _, ids in items])
+    return [
+        (recipe_id, signature.tobytes(), band_buckets(signature))
+        for (recipe_id, _), signature in zip(items, signatures)
+    ]
+
+
+@transaction.atomic
+def save_index_rows(rows, recipe_ids=()):
+    """Заменяет сигнатуры и корзины рецептов на рассчитанные."""
+    if recipe_ids:
+        RecipeSignature.objects.filter(recipe_id__in=recipe_ids).delete()
+        LshBucket.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeSignature.objects.bulk_create([
+        RecipeSignature(recipe_id=recipe_id, minhash=minhash)
+        for recipe_id, minhash, _ in rows
+    ])
+    LshBucket.objects.bulk_create([
+        LshBucket(recipe_id=recipe_id, bucket=bucket)
+        for recipe_id, _, buckets in rows
+        for bucket in set(buckets)
+    ])
+
+
+def update_recipe_signature(recipe_id, ingredient_ids):
+    """Пересчитывает индекс для одного рецепта."""
+    save_index_rows(
+        compute_index_rows([(recipe_id, list(ingredient_ids))]),
+        recipe_ids=[recipe_id]
+    )
+
+
+def jaccard(first, second):
+    union = len(first | second)
+    return len(first & second) / union if union else 0.0
+
+
+def find_similar_recipes(recipe, limit):
+    """Похожие рецепты, отсортированные по коэффициенту Жаккара."""
+    candidate_ids = set(
+        LshBucket.objects
+        .filter(bucket__in=recipe.lsh_buckets.values('bucket'))
+        .exclude(recipe=recipe)
+        .values('recipe_id')
+        .annotate(shared=Count('*'))
+        .order_by('-shared', 'recipe_id')
+        .values_list('recipe_id', flat=True)[:SIMILAR_CANDIDATES_LIMIT]
+    )
+    if not candidate_ids:
+        return []
+    ingredients = defaultdict(set)
+    pairs = (
+        RecipeIngredient.objects
+        .filter(recipe_id__in=candidate_ids | {recipe.id})
+        .order_by()
+        .values_list('recipe_id', 'ingredient_id')
+    )
+    for recipe_id, ingredient_id in pairs:
+        ingredients[recipe_id].add(ingredient_id)
+    own = ingredients[recipe.id]
+    ranked = sorted(
+        candidate_ids,
+        key=lambda pk: (-jaccard(own, ingredients[pk]), pk)
+    )[:limit]
+    recipes = Recipe.objects.in_bulk(ranked)
+    return [recipes[pk] for pk in ranked if pk in recipes]
@@ -0,0 +1,162 @@
+"""
+Сборка JSON рецептов в PostgreSQL.
+
+Текст ответа собирается запросом целиком и совпадает побайтно с
+компактным выводом `RecipeReadSerializer` через `ORJSONRenderer`, поэтому
+представление отдаёт его без создания моделей и сериализаторов.
+`json_build_object` и `json_agg` не подходят: они добавляют пробелы
+после `:` и `,`. Поэтому объекты склеиваются из значений `to_json()`,
+экранирование которых совпадает с orjson. Теги и ингредиенты
+собираются в LATERAL-подзапросах.
+
+Включается настройкой RECIPE_JSON_IN_DB и работает только с
+FileSystemStorage, ссылки на файлы которого можно построить в SQL.
+"""
+import functools
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import connection
+
+from backend.settings import RECIPE_JSON_IN_DB
+from core.renderers import dumps, escape_separators
+from .utils import RECIPE_FIELDS
+
+# Символы, которые `filepath_to_uri` оставляет без кодирования.
+URI_SAFE_CHARS = (
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+    "_.-~/!*()'"
+)
+
+
+def file_url_sql(column):
+    """
+    Абсолютная ссылка на файл или null, как `ImageField` сериализатора.
+
+    Байты имени в UTF-8 кодируются, как в `filepath_to_uri`, поэтому
+    результат не зависит от кодировки сервера.
+    """
+    return f"""
+        CASE WHEN COALESCE({column}, '') = '' THEN 'null'
+        ELSE to_json(%(media)s || (
+            SELECT string_agg(
+                CASE
+                    WHEN byte >= 128 THEN '%%' || upper(to_hex(byte))
+                    WHEN strpos(%(uri_safe)s, chr(byte)) > 0 THEN chr(byte)
+                    ELSE '%%' || upper(lpad(to_hex(byte), 2, '0'))
+                END,
+                '' ORDER BY n
+            )
+            FROM convert_to(replace({column}, '\\', '/'), 'UTF8')
+                AS name(bytes),
+                generate_series(0, length(name.bytes) - 1) AS n,
+                get_byte(name.bytes, n) AS byte
+        ))::text END"""
+
+
+VIEWER_SUBSCRIBED = """EXISTS (
+    SELECT 1 FROM users_subscription s
+    WHERE s.subscribed_to_id = u.id AND s.subscriber_id = %(user)s
+)::text"""
+
+FIELDS = {
+    'id': 'r.id::text',
+    'tags': 'tags.json',
+    'author': f"""'{{"email":' || to_json(u.email)::text
+        || ',"id":' || u.id
+        || ',"username":' || to_json(u.username)::text
+        || ',"first_name":' || to_json(u.first_name)::text
+        || ',"last_name":' || to_json(u.last_name)::text
+        || ',"is_subscribed":' || {VIEWER_SUBSCRIBED}
+        || ',"avatar":' || {file_url_sql('u.avatar')} || '}}'""",
+    'ingredients': 'ingredients.json',
+    'is_favorited': """EXISTS (
+        SELECT 1 FROM recipes_favorite f
+        WHERE f.recipe_id = r.id AND f.user_id = %(user)s
+    )::text""",
+    'is_in_shopping_cart': """EXISTS (
+        SELECT 1 FROM recipes_cart_recipes cr
+        JOIN recipes_cart c ON c.id = cr.cart_id
+        WHERE cr.recipe_id = r.id AND c.user_id = %(user)s
+    )::text""",
+    'name': 'to_json(r.name)::text',
+    'image': file_url_sql('r.image'),
+    'text': 'to_json(r.text)::text',
+    'cooking_time': 'r.cooking_time::text',
+}
+
+JOINS = {
+    'author': 'JOIN users_user u ON u.id = r.author_id',
+    'tags': """CROSS JOIN LATERAL (
+        SELECT '[' || COALESCE(string_agg(
+            '{"id":' || t.id
+            || ',"name":' || to_json(t.name)::text
+            || ',"slug":' || to_json(t.slug)::text || '}',
+            ',' ORDER BY t.name
+        ), '') || ']' AS json
+        FROM recipes_recipe_tags rt
+        JOIN recipes_tag t ON t.id = rt.tag_id
+        WHERE rt.recipe_id = r.id
+    ) tags""",
+    'ingredients': """CROSS JOIN LATERAL (
+        SELECT '[' || COALESCE(string_agg(
+            '{"id":' || ri.id
+            || ',"amount":' || ri.amount
+            || ',"name":' || to_json(i.name)::text
+            || ',"measurement_unit":' || to_json(i.measurement_unit)::text
+            || '}',
+            ',' ORDER BY ri.id
+        ), '') || ']' AS json
+        FROM recipes_recipeingredient ri
+        JOIN recipes_ingredient i ON i.id = ri.ingredient_id
+        WHERE ri.recipe_id = r.id
+    ) ingredients""",
+}
+
+
+def available():
+    """Включена ли сборка JSON в PostgreSQL."""
+    return RECIPE_JSON_IN_DB and isinstance(
+        default_storage, FileSystemStorage
+    )
+
+
+@functools.lru_cache
+def recipes_sql(fields):
+    """Запрос JSON-массива рецептов с полями `fields`."""
+    members = " || ',' || ".join(
+        f"""'"{name}":' || {FIELDS[name]}""" for name in fields
+    ) or "''"
+    joins = '\n'.join(JOINS[name] for name in JOINS if name in fields)
+    return f"""
+        SELECT '[' || COALESCE(string_agg(
+            '{{' || {members} || '}}', ',' ORDER BY p.n
+        ), '') || ']'
+        FROM unnest(%(ids)s::bigint[]) WITH ORDINALITY AS p(id, n)
+        JOIN recipes_recipe r ON r.id = p.id
+        {joins}
+    """
+
+
+def render_recipes(request, ids, fields=RECIPE_FIELDS):
+    """JSON-массив рецептов в порядке `ids`; отсутствующие пропускаются."""
+    with connection.cursor() as cursor:
+        cursor.execute(recipes_sql(tuple(fields)), {
+            'ids': list(ids),
+            'user': request.user.id,
+            'media': request.build_absolute_uri(default_storage.base_url),
+            'uri_safe': URI_SAFE_CHARS,
+        })
+        content = cursor.fetchone()[0]
+    return escape_separators(content.encode())
+
+
+def page_json(count, next_url, previous_url, results, extra=None):
+    """
+    Ответ `CustomPageNumberPagination` с готовым JSON результатов;
+    `extra` добавляет в ответ другие ключи.
+    """
+    envelope = dumps({
+        'count': count, 'next': next_url, 'previous': previous_url,
+        **(extra or {}),
+    })
+    return envelope[:-1] + b',"results":' + results + b'}'
@@ -0,0 +1,77 @@
+import os
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.jobs import enqueue_on_commit, job
+from users.models import Subscription
+from .feed import (backfill_author_feeds, backfill_feed, fan_out_recipe,
+                   trim_feed, update_pull_author)
+from .models import Recipe
+
+
+@job
+def delete_file(path):
+    """Удаляет файл с диска."""
+    if os.path.isfile(path):
+        os.remove(path)
+
+
+@job
+def fan_out_new_recipe(recipe_id):
+    """Раскладывает рецепт по лентам подписчиков автора."""
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe:
+        fan_out_recipe(recipe)
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_recipe_image(sender, instance, **kwargs):
+    """Удаляет файл изображения при удалении рецепта."""
+    if instance.image:
+        enqueue_on_commit(delete_file, path=instance.image.path)
+
+
+@receiver(pre_save, sender=Recipe)
+def delete_replaced_image(sender, instance, raw=False, **kwargs):
+    """Удаляет прежний файл изображения, если рецепту загрузили новый."""
+    if raw or instance.pk is None:
+        return
+    old = Recipe.objects.filter(pk=instance.pk).values_list(
+        'image', flat=True
+    ).first()
+    if old and old != instance.image.name:
+        enqueue_on_commit(
+            delete_file, path=instance.image.storage.path(old)
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def schedule_fan_out(sender, instance, created, **kwargs):
+    """Ставит раскладку нового рецепта по лентам в очередь."""
+    if created:
+        enqueue_on_commit(fan_out_new_recipe, recipe_id=instance.id)
+
+
+@job
+def backfill_push_author_feeds(author_id):
+    """Дополняет ленты подписчиков автора, вернувшегося к раскладке."""
+    backfill_author_feeds(author_id)
+
+
+@receiver(post_save, sender=Subscription)
+def backfill_on_subscribe(sender, instance, created, **kwargs):
+    """Отмечает популярного автора и дополняет ленту подписчика."""
+    if created:
+        update_pull_author(instance.subscribed_to_id)
+        backfill_feed(instance.subscriber_id, instance.subscribed_to_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def trim_on_unsubscribe(sender, instance, **kwargs):
+    """Чистит ленту отписавшегося; автора может вернуть к раскладке."""
+    trim_feed(instance.subscriber_id, instance.subscribed_to_id)
+    if update_pull_author(instance.subscribed_to_id):
+        enqueue_on_commit(
+            backfill_push_author_feeds, author_id=instance.subscribed_to_id
+        )
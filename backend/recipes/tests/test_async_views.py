@@ -0,0 +1,131 @@
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client, TestCase
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Cart, Favorite, Ingredient, Recipe, Tag
+from users.models import User
+
+LIST_QUERIES = (
+    {},
+    {'limit': 2},
+    {'limit': 2, 'page': 2},
+    {'limit': 2, 'page': 'last'},
+    {'limit': 'abc'},
+    {'limit': 0},
+    {'page': 99},
+    {'page': 'abc'},
+    {'page': 0},
+    {'is_favorited': 'true'},
+    {'is_in_shopping_cart': 'false', 'limit': 3},
+    {'tags': ['lunch']},
+    {'tags': ['unknown']},
+    {'author': 'abc'},
+    {'ordering': 'popular'},
+    {'fields': 'id,name'},
+)
+
+
+class AsyncViewsTests(TestCase):
+    """
+    Асинхронные представления отвечают так же, как синхронные DRF:
+    пагинация, 404 и аутентификация списка, деталей и списка покупок.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            email='reader@example.com',
+            username='reader',
+            first_name='reader',
+            last_name='reader',
+            password='Async-views-test-1',
+        )
+        cls.token = Token.objects.create(user=cls.reader).key
+        tag = Tag.objects.create(name='Обед', slug='lunch')
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        water = Ingredient.objects.create(name='вода', measurement_unit='мл')
+        cls.recipes = []
+        for number in range(5):
+            recipe = Recipe.objects.create(
+                name=f'Рецепт {number}',
+                text='Описание',
+                image=f'recipes/images/{number}.png',
+                cooking_time=number + 1,
+                author=cls.reader,
+            )
+            if number % 2:
+                recipe.tags.set([tag])
+            recipe.ingredients.create(ingredient=salt, amount=number + 1)
+            recipe.ingredients.create(ingredient=water, amount=100)
+            cls.recipes.append(recipe)
+        Favorite.objects.create(user=cls.reader, recipe=cls.recipes[0])
+        Cart.objects.create(user=cls.reader).recipes.set(cls.recipes[1:4])
+
+    def headers(self, auth):
+        return {
+            None: {},
+            'token': {'Authorization': f'Token {self.token}'},
+            'invalid': {'Authorization': 'Token invalid'},
+        }[auth]
+
+    def summary(self, response, body):
+        return (
+            response.status_code,
+            response['Content-Type'],
+            response.get('Content-Disposition'),
+            body,
+        )
+
+    async def async_get(self, path, data, headers):
+        with self.settings(ROOT_URLCONF='backend.urls_async'):
+            response = await AsyncClient().get(path, data, headers=headers)
+        if response.streaming:
+            body = b''.join([
+                chunk async for chunk in response.streaming_content
+            ])
+        else:
+            body = response.content
+        return self.summary(response, body)
+
+    def assert_same(self, path, data=None, auth=None):
+        """Ответы синхронного и асинхронного представлений совпадают."""
+        headers = self.headers(auth)
+        response = Client().get(path, data, headers=headers)
+        expected = self.summary(response, (
+            b''.join(response.streaming_content) if response.streaming
+            else response.content
+        ))
+        actual = async_to_sync(self.async_get)(path, data, headers)
+        with self.subTest(path=path, data=data, auth=auth):
+            self.assertEqual(actual, expected)
+        return actual
+
+    def test_recipe_list(self):
+        for auth in (None, 'token'):
+            for data in LIST_QUERIES:
+                self.assert_same('/api/recipes/', data, auth)
+
+    def test_recipe_detail(self):
+        for auth in (None, 'token'):
+            for recipe in self.recipes[:2]:
+                self.assert_same(f'/api/recipes/{recipe.id}/', auth=auth)
+            self.assert_same(
+                f'/api/recipes/{self.recipes[-1].id + 1}/', auth=auth
+            )
+
+    def test_invalid_token(self):
+        for path in (
+            '/api/recipes/',
+            f'/api/recipes/{self.recipes[0].id}/',
+            '/api/recipes/download_shopping_cart/',
+        ):
+            status, *_ = self.assert_same(path, auth='invalid')
+            self.assertEqual(status, 401)
+
+    def test_shopping_list(self):
+        path = '/api/recipes/download_shopping_cart/'
+        status, *_ = self.assert_same(path)
+        self.assertEqual(status, 401)
+        status, _, _, body = self.assert_same(path, auth='token')
+        self.assertEqual(status, 200)
+        self.assertIn('соль'.encode(), body)
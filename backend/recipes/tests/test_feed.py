@@ -0,0 +1,96 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.jobs import claim_jobs, run_job
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscription, User
+
+# Порог раскладки в тестах: автор с двумя подписчиками уже «популярный».
+MAX_SUBSCRIBERS = 1
+
+
+@mock.patch('recipes.feed.FEED_FANOUT_MAX_SUBSCRIBERS', MAX_SUBSCRIBERS)
+class FeedTests(APITestCase):
+    """Лента подписок при переходе автора между раскладкой и pull."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.other, cls.reader, cls.fan = (
+            User.objects.create_user(
+                email=f'{username}@example.com',
+                username=username,
+                first_name=username,
+                last_name=username,
+                password='Feed-test-1',
+            )
+            for username in ('author', 'other', 'reader', 'fan')
+        )
+
+    def publish(self, author, name, age):
+        """Рецепт, опубликованный `age` часов назад, и его раскладка."""
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(
+                name=name,
+                text=name,
+                image='recipes/images/test.png',
+                cooking_time=10,
+                author=author,
+            )
+        Recipe.objects.filter(pk=recipe.pk).update(
+            created_at=timezone.now() - timedelta(hours=age)
+        )
+        self.run_jobs()
+        return recipe
+
+    def run_jobs(self):
+        for job in claim_jobs(100):
+            self.assertTrue(run_job(job))
+
+    def subscribe(self, subscriber, author):
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.create(
+                subscriber=subscriber, subscribed_to=author
+            )
+        self.run_jobs()
+
+    def unsubscribe(self, subscriber, author):
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.get(
+                subscriber=subscriber, subscribed_to=author
+            ).delete()
+        self.run_jobs()
+
+    def feed(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/recipes/feed/', {'limit': 100})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_pull_author_recipes_stay_after_crossing_back(self):
+        self.subscribe(self.reader, self.author)
+        self.subscribe(self.fan, self.author)
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.feed_pull)
+        pulled = self.publish(self.author, 'pulled', age=1)
+        self.assertFalse(FeedEntry.objects.filter(recipe=pulled).exists())
+        self.assertEqual(self.feed(self.reader), [pulled.id])
+
+        self.unsubscribe(self.fan, self.author)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.feed_pull)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, recipe=pulled).exists()
+        )
+        self.assertEqual(self.feed(self.reader), [pulled.id])
+        self.assertEqual(self.feed(self.fan), [])
+
+    def test_feed_ordered_by_publication(self):
+        self.subscribe(self.reader, self.author)
+        self.subscribe(self.reader, self.other)
+        old = self.publish(self.author, 'old', age=3)
+        new = self.publish(self.other, 'new', age=1)
+        middle = self.publish(self.author, 'middle', age=2)
+        self.assertEqual(self.feed(self.reader), [new.id, middle.id, old.id])
@@ -0,0 +1,110 @@
+import itertools
+
+from rest_framework.test import APITestCase
+
+from recipes.models import Cart, Favorite, Recipe, Tag
+from users.models import User
+
+FLAGS = (None, 'true', 'false')
+# Рецепт: (автор, теги). У нескольких рецептов по два тега.
+RECIPES = {
+    'omelette': ('chef', ('breakfast', 'lunch')),
+    'soup': ('chef', ('lunch',)),
+    'steak': ('cook', ('dinner',)),
+    'porridge': ('cook', ('breakfast', 'dinner')),
+    'bread': ('cook', ()),
+}
+FAVORITES = {
+    'reader': ('omelette', 'steak'),
+    'chef': ('omelette', 'soup'),
+    'cook': ('omelette', 'bread'),
+}
+CARTS = {
+    'reader': ('omelette', 'porridge'),
+    'chef': ('soup', 'porridge'),
+    'cook': ('omelette',),
+}
+
+
+class RecipeFilterTests(APITestCase):
+    """Сочетания фильтров списка рецептов на заранее известных данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            username: User.objects.create_user(
+                email=f'{username}@example.com',
+                username=username,
+                first_name=username,
+                last_name=username,
+                password='Filters-test-1',
+            )
+            for username in ('reader', 'chef', 'cook')
+        }
+        tags = {
+            slug: Tag.objects.create(name=slug, slug=slug)
+            for slug in ('breakfast', 'lunch', 'dinner')
+        }
+        cls.recipes = {}
+        for name, (author, slugs) in RECIPES.items():
+            recipe = Recipe.objects.create(
+                name=name,
+                text=name,
+                image='recipes/images/test.png',
+                cooking_time=10,
+                author=cls.users[author],
+            )
+            recipe.tags.set(tags[slug] for slug in slugs)
+            cls.recipes[name] = recipe
+        for username, names in FAVORITES.items():
+            for name in names:
+                Favorite.objects.create(
+                    user=cls.users[username], recipe=cls.recipes[name]
+                )
+        for username, names in CARTS.items():
+            cart = Cart.objects.create(user=cls.users[username])
+            cart.recipes.set(cls.recipes[name] for name in names)
+
+    def expected(self, username, tags, author, favorited, in_cart):
+        names = set(RECIPES)
+        if tags:
+            names = {
+                name for name in names if set(RECIPES[name][1]) & set(tags)
+            }
+        if author:
+            names = {name for name in names if RECIPES[name][0] == author}
+        for value, related in ((favorited, FAVORITES), (in_cart, CARTS)):
+            if value is None or username is None:
+                continue
+            own = set(related[username])
+            names = names & own if value == 'true' else names - own
+        return {self.recipes[name].id for name in names}
+
+    def test_filter_combinations(self):
+        for username, tags, author, favorited, in_cart in itertools.product(
+            (None, 'reader', 'chef'),
+            ((), ('breakfast',), ('breakfast', 'dinner')),
+            (None, 'cook'),
+            FLAGS,
+            FLAGS,
+        ):
+            params = {'limit': 100, 'tags': list(tags)}
+            if author:
+                params['author'] = self.users[author].id
+            if favorited:
+                params['is_favorited'] = favorited
+            if in_cart:
+                params['is_in_shopping_cart'] = in_cart
+            with self.subTest(user=username, **params):
+                self.client.force_authenticate(
+                    self.users[username] if username else None
+                )
+                response = self.client.get('/api/recipes/', params)
+                self.assertEqual(response.status_code, 200)
+                ids = [recipe['id'] for recipe in response.json()['results']]
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(response.json()['count'], len(ids))
+                self.assertEqual(
+                    set(ids),
+                    self.expected(username, tags, author, favorited, in_cart)
+                )
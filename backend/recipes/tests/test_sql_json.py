@@ -0,0 +1,111 @@
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+from recipes.models import Cart, Favorite, Ingredient, Recipe, Tag
+from recipes.utils import RECIPE_FIELDS
+from users.models import Subscription, User
+
+FIELD_SETS = (
+    RECIPE_FIELDS,
+    ('id', 'name', 'image', 'cooking_time'),
+    ('author', 'is_favorited', 'is_in_shopping_cart'),
+    ('tags', 'ingredients'),
+    (),
+)
+
+# Строки, на которых расходится экранирование JSON и кодирование URL.
+TRICKY = 'Кавычки " \\ /\tтаб\x01\x1f\x7f   😀'
+
+
+class RecipeJsonInDbTests(APITestCase):
+    """
+    JSON рецептов, собранный в PostgreSQL, совпадает побайтно с выводом
+    `RecipeReadSerializer` через рендерер для списка и деталей.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            email='reader@example.com',
+            username='reader',
+            first_name='reader',
+            last_name='reader',
+            password='Json-in-db-test-1',
+        )
+        author = User.objects.create_user(
+            email='author@example.com',
+            username='author',
+            first_name=TRICKY[:32],
+            last_name='author',
+            password='Json-in-db-test-1',
+            avatar='users/images/a b~c\'d.png',
+        )
+        tags = [
+            Tag.objects.create(name=TRICKY[:32], slug='tricky'),
+            Tag.objects.create(name='Обед', slug='lunch'),
+        ]
+        ingredients = [
+            Ingredient.objects.create(name='соль', measurement_unit='"г"\n'),
+            Ingredient.objects.create(name='вода', measurement_unit='мл'),
+        ]
+        recipes = [
+            Recipe.objects.create(
+                name=TRICKY[:64],
+                text=TRICKY * 3,
+                image='recipes/images/фото блюда (1)+%.jpg',
+                cooking_time=5,
+                author=author,
+            ),
+            Recipe.objects.create(
+                name='Суп',
+                text='Сварить.',
+                image='recipes/images/soup.png',
+                cooking_time=30,
+                author=cls.reader,
+            ),
+            Recipe.objects.create(
+                name='Без тегов',
+                text='Без ингредиентов.',
+                image='recipes/images/plain.png',
+                cooking_time=1,
+                author=author,
+            ),
+        ]
+        recipes[0].tags.set(tags)
+        recipes[1].tags.set(tags[1:])
+        for recipe in recipes[:2]:
+            for amount, ingredient in enumerate(ingredients, start=1):
+                recipe.ingredients.create(ingredient=ingredient, amount=amount)
+        Favorite.objects.create(user=cls.reader, recipe=recipes[0])
+        Cart.objects.create(user=cls.reader).recipes.set(recipes[1:])
+        Subscription.objects.create(
+            subscriber=cls.reader, subscribed_to=author
+        )
+        cls.recipes = recipes
+
+    def get(self, path, fields, in_db):
+        omit = [name for name in RECIPE_FIELDS if name not in fields]
+        with mock.patch('recipes.sql_json.RECIPE_JSON_IN_DB', in_db):
+            response = self.client.get(path, {'omit': ','.join(omit)})
+        self.assertEqual(response.status_code, 200)
+        # Ответ из БД отдаётся готовым HttpResponse, без `data`.
+        self.assertEqual(hasattr(response, 'data'), not in_db)
+        return response.content
+
+    def assert_same_json(self, path):
+        for user in (None, self.reader):
+            self.client.force_authenticate(user)
+            for fields in FIELD_SETS:
+                with self.subTest(path=path, user=user, fields=fields):
+                    self.assertEqual(
+                        self.get(path, fields, in_db=True),
+                        self.get(path, fields, in_db=False),
+                    )
+
+    def test_list(self):
+        self.assert_same_json('/api/recipes/')
+
+    def test_detail(self):
+        for recipe in self.recipes:
+            self.assert_same_json(f'/api/recipes/{recipe.id}/')
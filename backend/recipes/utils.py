@@ -1,25 +1,115 @@
-from django.db.models import Sum
+from django.db.models import (DecimalField, Exists, F, OuterRef, Prefetch,
+                              Subquery, Sum, Value)
+from django.db.models.functions import Coalesce
 
-from .models import Cart, RecipeIngredient
+from core.serializers import parse_field_names
+from users.models import Subscription
+from .models import Cart, Favorite, RecipeIngredient, UnitConversion
+
+RECIPE_FIELDS = (
+    'id', 'tags', 'author', 'ingredients',
+    'is_favorited', 'is_in_shopping_cart',
+    'name', 'image', 'text', 'cooking_time',
+)
+
+# Связь из ?include= -> (поле рецепта, поле со ссылкой вместо него).
+SIDELOADS = {
+    'users': ('author', 'author_id'),
+    'tags': ('tags', 'tag_ids'),
+}
+
+
+def sideloaded(request, fields):
+    """
+    Связи из `?include=users,tags`, которые выносятся в `included`
+    ответа, а в рецептах заменяются идентификаторами.
+    """
+    names = parse_field_names(request.GET.get('include', ''))
+    return [
+        name for name, (field, _) in SIDELOADS.items()
+        if name in names and field in fields
+    ]
+
+
+def sideload_fields(fields, sideload):
+    """Поля рецепта, в которых вынесенные связи заменены ссылками."""
+    replaced = dict(SIDELOADS[name] for name in sideload)
+    return [replaced.get(name, name) for name in fields]
+
+
+def recipe_read_queryset(queryset, user, fields=RECIPE_FIELDS):
+    """
+    Готовит рецепты к выдаче: загружает только связанные объекты
+    из `fields` и аннотирует флаги текущего пользователя.
+    """
+    if 'author' in fields:
+        queryset = queryset.select_related('author')
+    if 'tags' in fields:
+        queryset = queryset.prefetch_related('tags')
+    if 'ingredients' in fields:
+        queryset = queryset.prefetch_related(Prefetch(
+            'ingredients',
+            queryset=RecipeIngredient.objects.select_related('ingredient')
+        ))
+    if 'text' not in fields:
+        queryset = queryset.defer('text')
+    if not user.is_authenticated:
+        return queryset
+    flags = {}
+    if 'is_favorited' in fields:
+        flags['viewer_favorited'] = Exists(
+            Favorite.objects.filter(recipe=OuterRef('pk'), user=user)
+        )
+    if 'is_in_shopping_cart' in fields:
+        flags['viewer_in_cart'] = Exists(
+            Cart.recipes.through.objects.filter(
+                recipe=OuterRef('pk'), cart__user=user
+            )
+        )
+    if 'author' in fields:
+        flags['viewer_subscribed'] = Exists(
+            Subscription.objects.filter(
+                subscribed_to=OuterRef('author'), subscriber=user
+            )
+        )
+    return queryset.annotate(**flags)
 
 
 def get_ingredients_from_cart(user):
-    """Получает все ингредиенты из корзины пользователя."""
-    try:
-        cart = Cart.objects.get(user=user)
-    except Cart.DoesNotExist:
-        return {}
-    ingredients = (
+    """
+    Суммарное количество ингредиентов из корзины пользователя.
+
+    Количества переводятся в базовые единицы по таблице `UnitConversion`
+    и суммируются одним сгруппированным запросом.
+    """
+    conversion = UnitConversion.objects.filter(
+        unit=OuterRef('ingredient__measurement_unit')
+    )
+    return (
         RecipeIngredient.objects
-        .filter(recipe__carts=cart)
-        .values('ingredient__name', 'ingredient__measurement_unit')
-        .annotate(total_amount=Sum('amount'))
+        .filter(recipe__carts__user=user)
+        .annotate(
+            unit=Coalesce(
+                Subquery(conversion.values('base_unit')[:1]),
+                F('ingredient__measurement_unit')
+            ),
+            factor=Coalesce(
+                Subquery(conversion.values('factor')[:1]),
+                Value(1),
+                output_field=DecimalField()
+            ),
+        )
+        .values('ingredient__name', 'unit')
+        .annotate(total_amount=Sum(
+            F('amount') * F('factor'), output_field=DecimalField()
+        ))
+        .order_by('ingredient__name', 'unit')
+    )
+
+
+def format_shopping_list_line(item):
+    """Строка списка покупок для одного ингредиента."""
+    amount = item['total_amount'].normalize()
+    return (
+        f'{item["ingredient__name"]} ({item["unit"]}) ― {amount:f}\n'
     )
-    ingredients_dict = {
-        item['ingredient__name']: {
-            'amount': item['total_amount'],
-            'measurement_unit': item['ingredient__measurement_unit']
-        }
-        for item in ingredients
-    }
-    return ingredients_dict
@@ -1,22 +1,39 @@
-from io import StringIO
-
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import status, viewsets
+from rest_framework import generics, status, viewsets
 from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from backend.settings import (PANTRY_MAX_INGREDIENTS, SHORT_LINK_CACHE_TIMEOUT,
+                              SIMILAR_RECIPES_LIMIT)
 from core.pagination import CustomPageNumberPagination
 from core.permissions import IsOwnerOrReadOnly, StrictAuthenticated
+from core.serializers import sparse_fields
+from core.throttling import TokenBucketThrottle
+from users.serializers import UserListSerializer
+from .changes import changes_since, parse_cursor
+from .facets import facets_requested, recipe_facets
+from .feed import get_feed_queryset
 from .filters import IngredientFilter, RecipeFilter
-from .models import Ingredient, Recipe, Tag
+from .models import (Change, Ingredient, Recipe, Tag, build_short_link,
+                     short_link_cache_key)
+from .pantry import recipes_by_ingredients
+from .ranking import register_engagement, withdraw_engagement
+from .reference import cached_ingredients, cached_tags
 from .serializers import (CartSerializer, FavoriteSerializer,
                           IngredientSerializer, RecipeBriefSerializer,
-                          RecipeReadSerializer, RecipeWriteSerializer,
-                          TagSerializer)
-from .utils import get_ingredients_from_cart
+                          RecipeCoverageSerializer, RecipeReadSerializer,
+                          RecipeWriteSerializer, TagSerializer)
+from .similarity import find_similar_recipes
+from .sql_json import available, page_json, render_recipes
+from .utils import (RECIPE_FIELDS, format_shopping_list_line,
+                    get_ingredients_from_cart, recipe_read_queryset,
+                    sideloaded)
 
 
 class RecipeView(viewsets.ModelViewSet):
@@ -27,17 +44,139 @@ class RecipeView(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     pagination_class = CustomPageNumberPagination
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scopes = {'download_shopping_cart': 'shopping_list'}
 
     def get_permissions(self):
-        if self.action in ('list', 'retrieve', 'recipe_by_link'):
+        if self.action in (
+            'list', 'retrieve', 'recipe_by_link', 'similar', 'changes',
+            'by_ingredients',
+        ):
             return (AllowAny(),)
         elif self.action in ('update', 'partial_update', 'destroy',):
             return (IsOwnerOrReadOnly(),)
         return (StrictAuthenticated(),)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return self.read_queryset(queryset)
+        return queryset
+
+    def read_queryset(self, queryset):
+        """Загружает только то, что нужно полям из ?fields= и ?omit=."""
+        return recipe_read_queryset(
+            queryset,
+            self.request.user,
+            sparse_fields(self.request, RECIPE_FIELDS)
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('list', 'feed'):
+            context['sideload'] = sideloaded(
+                self.request, sparse_fields(self.request, RECIPE_FIELDS)
+            )
+        return context
+
+    def json_in_db(self):
+        """
+        Можно ли отдать рецепты JSON-ом, собранным в PostgreSQL:
+        сборка включена, ответ компактный JSON и без ?include=.
+        """
+        renderer = self.request.accepted_renderer
+        return (
+            available()
+            and isinstance(renderer, JSONRenderer)
+            and not renderer.get_indent(
+                self.request.accepted_media_type,
+                self.get_renderer_context()
+            )
+            and not self.get_serializer_context().get('sideload')
+        )
+
+    def render_in_db(self, ids):
+        return render_recipes(
+            self.request, ids, sparse_fields(self.request, RECIPE_FIELDS)
+        )
+
+    def list(self, request, *args, **kwargs):
+        """Список рецептов; с ?facets=true — и фасеты по фильтрам."""
+        queryset = self.filter_queryset(self.get_queryset())
+        extra = {}
+        if facets_requested(request):
+            extra['facets'] = recipe_facets(request)
+        return self.recipe_page(queryset, extra)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.json_in_db():
+            return super().retrieve(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        pk = generics.get_object_or_404(
+            queryset.prefetch_related(None).values_list('pk', flat=True),
+            pk=kwargs['pk'],
+        )
+        return HttpResponse(
+            self.render_in_db([pk])[1:-1], content_type='application/json'
+        )
+
+    def recipe_page(self, queryset, extra=None):
+        """
+        Страница рецептов; связи из ?include= выносятся в `included`
+        и сериализуются один раз на страницу, `extra` добавляется
+        в ответ как есть.
+        """
+        if self.json_in_db():
+            ids = self.paginate_queryset(
+                queryset.prefetch_related(None).values_list('pk', flat=True)
+            )
+            return HttpResponse(
+                page_json(
+                    self.paginator.page.paginator.count,
+                    self.paginator.get_next_link(),
+                    self.paginator.get_previous_link(),
+                    self.render_in_db(ids),
+                    extra,
+                ),
+                content_type='application/json',
+            )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        sideload = serializer.context['sideload']
+        if sideload:
+            response.data['included'] = self.get_included(page, sideload)
+        response.data.update(extra or {})
+        return response
+
+    def get_included(self, recipes, sideload):
+        included = {}
+        if 'users' in sideload:
+            authors = {}
+            for recipe in recipes:
+                if hasattr(recipe, 'viewer_subscribed'):
+                    recipe.author.viewer_subscribed = recipe.viewer_subscribed
+                authors.setdefault(recipe.author_id, recipe.author)
+            data = UserListSerializer(
+                list(authors.values()),
+                many=True,
+                context={'request': self.request, 'sparse': False},
+            ).data
+            included['users'] = dict(zip(authors, data))
+        if 'tags' in sideload:
+            tags = {
+                tag.id: tag for recipe in recipes for tag in recipe.tags.all()
+            }
+            included['tags'] = dict(
+                zip(tags, TagSerializer(list(tags.values()), many=True).data)
+            )
+        return included
+
     def get_serializer_class(self):
-        if self.action == 'favorite':
+        if self.action in ('favorite', 'similar'):
             return RecipeBriefSerializer
+        elif self.action == 'by_ingredients':
+            return RecipeCoverageSerializer
         elif self.action in ('updata', 'partial_update', 'create', 'destroy'):
             return RecipeWriteSerializer
         return super().get_serializer_class()
@@ -54,11 +193,13 @@ class RecipeView(viewsets.ModelViewSet):
         if request.method == 'POST':
             serializer.save()
             request.user.cart.recipes.add(recipe)
+            register_engagement(recipe)
             return Response(
                 serializer.data,
                 status=status.HTTP_201_CREATED
             )
         request.user.cart.recipes.remove(recipe)
+        withdraw_engagement(recipe)
         return Response(
             {'detail': 'Рецепт удалён из корзины.'},
             status=status.HTTP_204_NO_CONTENT
@@ -68,14 +209,11 @@ class RecipeView(viewsets.ModelViewSet):
     def download_shopping_cart(self, request):
         """Скачать список ингредиентов из корзины."""
         ingredients = get_ingredients_from_cart(request.user)
-        output = StringIO()
-        for name, data in ingredients.items():
-            output.write(
-                f'{name} ({data["measurement_unit"]})'
-                f' ― {int(data["amount"])}\n'
-            )
-        response = HttpResponse(
-            output.getvalue(),
+        response = StreamingHttpResponse(
+            (
+                format_shopping_list_line(item)
+                for item in ingredients.iterator()
+            ),
             content_type='text/plain'
         )
         response['Content-Disposition'] = (
@@ -94,31 +232,136 @@ class RecipeView(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         if request.method == 'POST':
             request.user.favorites.create(recipe=recipe)
+            register_engagement(recipe)
             return Response(
                 serializer.to_representation(recipe),
                 status=status.HTTP_201_CREATED
             )
         request.user.favorites.filter(recipe=recipe).delete()
+        withdraw_engagement(recipe)
         return Response(
             {'detail': 'Рецепт удалён из избранного.'},
             status=status.HTTP_204_NO_CONTENT
         )
 
+    @action(detail=False, methods=['get'], url_path='feed')
+    def feed(self, request):
+        """Рецепты авторов, на которых подписан пользователь."""
+        queryset = self.filter_queryset(
+            self.read_queryset(get_feed_queryset(request.user))
+        )
+        return self.recipe_page(queryset)
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Изменения после курсора `?since=`: изменённые рецепты, удалённые
+        рецепты и изменения избранного и корзины пользователя.
+        """
+        since = request.query_params.get('since')
+        try:
+            cursor = parse_cursor(since) if since else None
+        except ValueError:
+            raise ValidationError({'since': 'Неверный курсор.'})
+        changes, cursor, has_more = changes_since(cursor, request.user)
+        latest = {
+            (change.kind, change.recipe_id): change.action
+            for change in changes
+        }
+        ids = {kind: {Change.UPSERT: [], Change.DELETE: []} for kind in (
+            Change.RECIPE, Change.FAVORITE, Change.CART
+        )}
+        for (kind, recipe_id), change in latest.items():
+            ids[kind][change].append(recipe_id)
+        recipes = self.read_queryset(
+            Recipe.objects.filter(pk__in=ids[Change.RECIPE][Change.UPSERT])
+        )
+        return Response({
+            'cursor': cursor,
+            'has_more': has_more,
+            'recipes': self.get_serializer(recipes, many=True).data,
+            'deleted_recipes': ids[Change.RECIPE][Change.DELETE],
+            'favorites': {
+                'added': ids[Change.FAVORITE][Change.UPSERT],
+                'removed': ids[Change.FAVORITE][Change.DELETE],
+            },
+            'shopping_cart': {
+                'added': ids[Change.CART][Change.UPSERT],
+                'removed': ids[Change.CART][Change.DELETE],
+            },
+        })
+
+    @action(detail=False, methods=['get'], url_path='by-ingredients')
+    def by_ingredients(self, request):
+        """
+        Рецепты по имеющимся ингредиентам `?ingredients=1,2,3`,
+        отсортированные по доле ингредиентов рецепта, которые есть.
+        """
+        try:
+            ingredient_ids = {
+                int(value) for value in
+                request.query_params.get('ingredients', '').split(',')
+                if value.strip()
+            }
+        except ValueError:
+            raise ValidationError(
+                {'ingredients': 'Ожидаются идентификаторы через запятую.'}
+            )
+        if not 0 < len(ingredient_ids) <= PANTRY_MAX_INGREDIENTS:
+            raise ValidationError({'ingredients': (
+                f'Укажите от 1 до {PANTRY_MAX_INGREDIENTS} ингредиентов.'
+            )})
+        page = self.paginate_queryset(
+            recipes_by_ingredients(ingredient_ids).defer('text')
+        )
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'], url_path='similar')
+    def similar(self, request, pk=None):
+        """Рецепты с похожим набором ингредиентов."""
+        recipe = get_object_or_404(Recipe, pk=pk)
+        recipes = find_similar_recipes(recipe, SIMILAR_RECIPES_LIMIT)
+        serializer = self.get_serializer(recipes, many=True)
+        return Response(serializer.data)
+
     @action(detail=True, methods=['get'], url_path='get-link')
     def recipe_by_link(self, request, pk=None):
         """Создать короткую ссылку на рецепт."""
-        short_link = get_object_or_404(Recipe, id=pk).generate_short_url()
-        return Response({'short-link': short_link})
+        short_code = get_object_or_404(
+            Recipe.objects.values_list('short_code', flat=True), id=pk
+        )
+        return Response({'short-link': build_short_link(short_code)})
 
 
 @api_view(['GET'])
 def recipe_by_short_url(request, short_url):
     """Получить рецепт по короткой ссылке."""
-    recipe = get_object_or_404(Recipe, short_url=short_url)
+    recipe = get_object_or_404(
+        recipe_read_queryset(
+            Recipe.objects.all(),
+            request.user,
+            sparse_fields(request, RECIPE_FIELDS)
+        ),
+        short_url=short_url
+    )
     serializer = RecipeReadSerializer(recipe, context={'request': request})
     return Response(serializer.data)
 
 
+def resolve_short_link(request, short_code):
+    """Перенаправляет короткую ссылку на страницу рецепта."""
+    key = short_link_cache_key(short_code)
+    recipe_id = cache.get(key)
+    if recipe_id is None:
+        recipe_id = get_object_or_404(
+            Recipe.objects.values_list('id', flat=True),
+            short_code=short_code
+        )
+        cache.set(key, recipe_id, SHORT_LINK_CACHE_TIMEOUT)
+    return redirect(f'/recipes/{recipe_id}')
+
+
 class TagView(viewsets.ModelViewSet):
     """Представление для тегов."""
 
@@ -128,6 +371,9 @@ class TagView(viewsets.ModelViewSet):
     pagination_class = None
     http_method_names = ['get', 'head', 'options']
 
+    def list(self, request, *args, **kwargs):
+        return Response(cached_tags())
+
 
 class IngredientView(viewsets.ModelViewSet):
     """Представление для ингредиентов."""
@@ -137,5 +383,13 @@ class IngredientView(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
     permission_classes = (AllowAny,)
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scope = 'ingredients'
     pagination_class = None
     http_method_names = ('get', 'head', 'options')
+
+    def list(self, request, *args, **kwargs):
+        """Без поиска по названию список берётся из кэша."""
+        if request.query_params.get('name'):
+            return super().list(request, *args, **kwargs)
+        return Response(cached_ingredients())
@@ -1,38 +1,18 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from core.admin import changelist_link, count_subquery
 from .models import Subscription, User
-from recipes.models import Cart, Favorite
-
-
-class FavouriteInline(admin.TabularInline):
-    """Inline-добавление избранных рецептов."""
-
-    model = Favorite
-
-
-class CartInline(admin.TabularInline):
-    """Inline-добавление карзины."""
-
-    model = Cart
-
-
-class SubscribersInline(admin.TabularInline):
-    """Inline-добавление подписчиков пользователя."""
-
-    model = Subscription
-    fk_name = 'subscriber'
-
-
-class SubscriptionsInline(admin.TabularInline):
-    """Inline-добавление подписок текущего пользователя."""
-
-    model = Subscription
-    fk_name = 'subscribed_to'
+from recipes.models import Cart, Favorite, Recipe
 
 
 class CustomUserAdmin(UserAdmin):
-    """Отображение модели пользователя в админке."""
+    """
+    Отображение модели пользователя в админке.
+
+    Вместо inline-списков избранного, корзины и подписок показываются
+    их количества со ссылками на постраничные списки.
+    """
 
     fieldsets = (
         (
@@ -43,6 +23,13 @@ class CustomUserAdmin(UserAdmin):
             'Персональные данные',
             {'fields': ('first_name', 'last_name', 'avatar')}
         ),
+        (
+            'Активность',
+            {'fields': (
+                'recipes_count', 'favorites_count', 'cart_count',
+                'subscriptions_count', 'subscribers_count'
+            )}
+        ),
         (
             'Разрешения',
             {'fields': (
@@ -54,17 +41,73 @@ class CustomUserAdmin(UserAdmin):
             'Важные даты', {'fields': ('last_login', 'date_joined')}
         ),
     )
+    readonly_fields = (
+        'recipes_count', 'favorites_count', 'cart_count',
+        'subscriptions_count', 'subscribers_count'
+    )
     search_fields = ('email', 'username')
     list_display = (
         'id', 'username', 'email', 'first_name',
-        'last_name', 'is_staff', 'avatar',
+        'last_name', 'is_staff', 'avatar', 'recipes_count',
+        'favorites_count', 'cart_count', 'subscriptions_count',
+        'subscribers_count',
     )
     ordering = ('id',)
-    inlines = (
-        FavouriteInline, CartInline, SubscriptionsInline, SubscribersInline
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipes_count=count_subquery(Recipe.objects, 'author'),
+            favorites_count=count_subquery(Favorite.objects, 'user'),
+            cart_count=count_subquery(
+                Cart.recipes.through.objects, 'cart__user'
+            ),
+            subscriptions_count=count_subquery(
+                Subscription.objects, 'subscriber'
+            ),
+            subscribers_count=count_subquery(
+                Subscription.objects, 'subscribed_to'
+            ),
+        )
+
+    @admin.display(description='Рецептов', ordering='recipes_count')
+    def recipes_count(self, obj):
+        return changelist_link(Recipe, obj.recipes_count, author=obj.id)
+
+    @admin.display(description='В избранном', ordering='favorites_count')
+    def favorites_count(self, obj):
+        return changelist_link(Favorite, obj.favorites_count, user=obj.id)
+
+    @admin.display(description='В корзине', ordering='cart_count')
+    def cart_count(self, obj):
+        return changelist_link(Cart, obj.cart_count, user=obj.id)
+
+    @admin.display(description='Подписок', ordering='subscriptions_count')
+    def subscriptions_count(self, obj):
+        return changelist_link(
+            Subscription, obj.subscriptions_count, subscriber=obj.id
+        )
+
+    @admin.display(description='Подписчиков', ordering='subscribers_count')
+    def subscribers_count(self, obj):
+        return changelist_link(
+            Subscription, obj.subscribers_count, subscribed_to=obj.id
+        )
+
+
+class SubscriptionAdmin(admin.ModelAdmin):
+    """Отображение подписок в админке."""
+
+    list_display = (
+        'subscriber',
+        'subscribed_to',
+        'created_at',
     )
+    list_select_related = ('subscriber', 'subscribed_to')
+    search_fields = ('subscriber__email', 'subscribed_to__email')
+    raw_id_fields = ('subscriber', 'subscribed_to')
+    show_full_result_count = False
 
 
 admin.site.register(User, CustomUserAdmin)
-admin.site.register(Subscription)
-admin.site.register(Favorite)
+admin.site.register(Subscription, SubscriptionAdmin)
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.20 on 2026-10-19 09:01
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='subscription',
+            index=models.Index(fields=['subscribed_to', 'subscriber'], name='subscription_author_idx'),
+        ),
+    ]
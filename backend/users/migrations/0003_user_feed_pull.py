@@ -0,0 +1,37 @@
+# Generated by Django 4.2.20 on 2026-10-19 10:11
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Значение FEED_FANOUT_MAX_SUBSCRIBERS на момент миграции.
+FANOUT_MAX_SUBSCRIBERS = 10000
+
+
+def fill_feed_pull(apps, schema_editor):
+    """Отмечает авторов, рецепты которых не раскладываются по лентам."""
+    Subscription = apps.get_model('users', 'Subscription')
+    User = apps.get_model('users', 'User')
+    pull_author_ids = (
+        Subscription.objects
+        .values('subscribed_to_id')
+        .annotate(followers=Count('id'))
+        .filter(followers__gt=FANOUT_MAX_SUBSCRIBERS)
+        .values('subscribed_to_id')
+    )
+    User.objects.filter(pk__in=pull_author_ids).update(feed_pull=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_subscription_author_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_pull',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Рецепты подмешиваются в ленты при чтении'),
+        ),
+        migrations.RunPython(fill_feed_pull, migrations.RunPython.noop),
+    ]
@@ -40,6 +40,11 @@ class User(AbstractUser):
         max_length=MAX_LENTHG_SHORT_NAME,
         verbose_name='Фамилия'
     )
+    feed_pull = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Рецепты подмешиваются в ленты при чтении'
+    )
     REQUIRED_FIELDS = ('username',)
     USERNAME_FIELD = 'email'
 
@@ -74,6 +79,12 @@ class Subscription(TimeStampModel):
             models.UniqueConstraint(
                 fields=['subscriber', 'subscribed_to'],
                 name='unique_subscription')]
+        indexes = [
+            models.Index(
+                fields=['subscribed_to', 'subscriber'],
+                name='subscription_author_idx'
+            ),
+        ]
 
     def __str__(self):
         return (
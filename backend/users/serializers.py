@@ -1,3 +1,5 @@
+import functools
+
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
@@ -8,10 +10,11 @@ from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
 from backend.settings import MAX_LENTGHT_EMAIL, MAX_LENTHG_SHORT_NAME
+from core.serializers import SparseFieldsetMixin
 from .models import Subscription, User
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Сериализатор для списка пользователей с проверкой подписки."""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -19,6 +22,8 @@ class UserListSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         """Проверка, подписан ли пользователь на данного автора."""
+        if hasattr(obj, 'viewer_subscribed'):
+            return obj.viewer_subscribed
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
@@ -106,6 +111,16 @@ class CustomTokenCreateSerializer(TokenCreateSerializer):
         fields = ('email', 'password')
 
 
+@functools.lru_cache
+def recipe_brief_serializer():
+    """
+    RecipeBriefSerializer. recipes.serializers сам импортирует этот модуль,
+    поэтому импорт выполняется при первом вызове, а не при загрузке.
+    """
+    from recipes.serializers import RecipeBriefSerializer
+    return RecipeBriefSerializer
+
+
 class UserWithRecipesSerializer(UserListSerializer):
     """Сериализатор для пользователя с его рецептами и подпиской."""
     recipes = serializers.SerializerMethodField()
@@ -121,8 +136,7 @@ class UserWithRecipesSerializer(UserListSerializer):
                 recipes = recipes[:recipes_limit]
             except ValueError:
                 pass
-        from recipes.serializers import RecipeBriefSerializer
-        return RecipeBriefSerializer(recipes, many=True).data
+        return recipe_brief_serializer()(recipes, many=True).data
 
     def get_recipes_count(self, obj):
         """Получение количества рецептов пользователя."""
@@ -1,13 +1,18 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import CustomObtainAuthToken, UserView
+from .views import CustomObtainAuthToken, ThrottledTokenCreateView, UserView
 
 router = routers.DefaultRouter()
 router.register('users', UserView, basename='user')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path(
+        'auth/token/login/',
+        ThrottledTokenCreateView.as_view(),
+        name='login'
+    ),
     path('auth/', include('djoser.urls.authtoken')),
     path(
         'auth/token/login/',
@@ -1,6 +1,8 @@
 import base64
 
 from django.core.files.base import ContentFile
+from django.db.models import Exists, OuterRef
+from djoser.views import TokenCreateView
 from rest_framework import status, viewsets
 from rest_framework.authentication import authenticate
 from rest_framework.authtoken.models import Token
@@ -11,7 +13,9 @@ from rest_framework.response import Response
 
 from core.pagination import CustomPageNumberPagination
 from core.permissions import IsOwnerOrReadOnly, StrictAuthenticated
-from .models import User
+from core.serializers import sparse_fields
+from core.throttling import IPTokenBucketThrottle
+from .models import Subscription, User
 from .serializers import (ChangePasswordSerializer, SubscriptionSerializer,
                           UserCreateSerializer, UserListSerializer,
                           UserWithRecipesSerializer)
@@ -36,6 +40,21 @@ class UserView(viewsets.ModelViewSet):
             return (StrictAuthenticated(),)
         return (StrictAuthenticated(),)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if (
+            self.action in ('list', 'retrieve')
+            and user.is_authenticated
+            and sparse_fields(self.request, ('is_subscribed',))
+        ):
+            queryset = queryset.annotate(viewer_subscribed=Exists(
+                Subscription.objects.filter(
+                    subscribed_to=OuterRef('pk'), subscriber=user
+                )
+            ))
+        return queryset
+
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return UserListSerializer
@@ -151,6 +170,8 @@ class CustomObtainAuthToken(ObtainAuthToken):
     """Кастомный класс для аутентификации через email и пароль."""
 
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'login'
 
     def post(self, request, *args, **kwargs):
         """Обработка POST-запроса для аутентификации и создания токена."""
@@ -162,3 +183,10 @@ class CustomObtainAuthToken(ObtainAuthToken):
             token, created = Token.objects.get_or_create(user=user)
             return Response({'token': token.key})
         return Response({'detail': 'Invalid credentials'}, status=400)
+
+
+class ThrottledTokenCreateView(TokenCreateView):
+    """Получение токена djoser с ограничением частоты попыток входа."""
+
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'login'